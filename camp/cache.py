@@ -0,0 +1,276 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp import About
+from camp.codecs.yaml import YAML
+
+from hashlib import sha1
+
+from io import BytesIO
+
+from os import fdopen, listdir, makedirs, remove, rename, utime
+from os.path import abspath, dirname, expanduser, getmtime, isdir, isfile, \
+    join as join_paths
+
+from sys import version_info
+
+from tempfile import mkstemp
+
+try:
+    from cPickle import dump as pickle, load as unpickle, HIGHEST_PROTOCOL
+except ImportError:
+    from pickle import dump as pickle, load as unpickle, HIGHEST_PROTOCOL
+
+
+
+class SolutionCache(object):
+    """
+    Keep on disk the configurations generated for a given model, so
+    that generating again for the very same model only reads them
+    back. The cache holds at most 'capacity' entries, and evicts the
+    least recently used ones first.
+    """
+
+    DEFAULT_DIRECTORY = "~/.camp/cache"
+    DEFAULT_CAPACITY = 50
+
+    def __init__(self, directory=None, capacity=None, codec=None):
+        self._directory = expanduser(directory or self.DEFAULT_DIRECTORY)
+        self._capacity = capacity or self.DEFAULT_CAPACITY
+        self._codec = codec or YAML()
+
+
+    @property
+    def directory(self):
+        return self._directory
+
+
+    def lookup(self, model, mode):
+        """
+        Return the cached configurations as a generator, or None if
+        there is no such entry.
+        """
+        entry = self._entry_for(model, mode)
+        if not isfile(entry):
+            return None
+        utime(entry, None)
+        return self._read(model, entry)
+
+
+    def _read(self, model, entry):
+        with open(entry, "r") as stream:
+            for each_configuration in self._codec.load_configurations_from(model, stream):
+                yield each_configuration
+
+
+    def recording(self, model, mode, configurations):
+        """
+        Yield the given configurations, and store them once they have
+        all been generated.
+        """
+        generated = []
+        for each_configuration in configurations:
+            generated.append(each_configuration)
+            yield each_configuration
+        self.store(model, mode, generated)
+
+
+    def store(self, model, mode, configurations):
+        if not isdir(self._directory):
+            makedirs(self._directory)
+        entry = self._entry_for(model, mode)
+        save_atomically(entry, "w",
+                        lambda stream: self._codec.save_configurations(configurations,
+                                                                       stream))
+        evict(self._directory, self.EXTENSION, self._capacity)
+
+
+    def _entry_for(self, model, mode):
+        return join_paths(self._directory, self.key_for(model, mode) + self.EXTENSION)
+
+    EXTENSION = ".yml"
+
+
+    @staticmethod
+    def key_for(model, mode):
+        content = repr((About.VERSION,
+                        ozepy_version(),
+                        mode,
+                        canonical_form(model)))
+        return sha1(content.encode("utf-8")).hexdigest()
+
+
+
+class ModelCache(object):
+    """
+    Keep on disk the models parsed from YAML files, so that running
+    CAMP again on the same model skips parsing. An entry remains valid
+    as long as the model file keeps its content. The cache holds at
+    most 'capacity' entries, and evicts the least recently used ones
+    first.
+    """
+
+    DEFAULT_DIRECTORY = "~/.camp/models"
+    DEFAULT_CAPACITY = 50
+
+    def __init__(self, directory=None, capacity=None):
+        self._directory = expanduser(directory or self.DEFAULT_DIRECTORY)
+        self._capacity = capacity or self.DEFAULT_CAPACITY
+
+
+    @property
+    def directory(self):
+        return self._directory
+
+
+    def load(self, path, codec):
+        """
+        Return the model in the given file, along with the locations
+        of its entries and the warnings raised while parsing it.
+        """
+        with open(path, "rb") as stream:
+            content = stream.read()
+        digest = sha1(content).hexdigest()
+        entry = self._entry_for(path)
+        cached = self._read(entry)
+        if cached and cached["digest"] == digest:
+            utime(entry, None)
+            return cached["model"], cached["locations"], cached["warnings"]
+
+        model = codec.load_model_from(BytesIO(content))
+        self._write(entry, {"version": self._version(),
+                            "digest": digest,
+                            "model": model,
+                            "locations": codec.locations,
+                            "warnings": list(codec.warnings)})
+        return model, codec.locations, list(codec.warnings)
+
+
+    def _entry_for(self, path):
+        name = sha1(abspath(path).encode("utf-8")).hexdigest()
+        return join_paths(self._directory, name + self.EXTENSION)
+
+    EXTENSION = ".pickle"
+
+
+    def _read(self, entry):
+        if not isfile(entry):
+            return None
+        try:
+            with open(entry, "rb") as stream:
+                cached = unpickle(stream)
+            if cached["version"] == self._version():
+                return cached
+
+        except Exception:
+            # Stale or corrupted entries are simply parsed again
+            pass
+
+        return None
+
+
+    def _write(self, entry, cached):
+        try:
+            if not isdir(self._directory):
+                makedirs(self._directory)
+            save_atomically(entry, "wb",
+                            lambda stream: pickle(cached, stream, HIGHEST_PROTOCOL))
+            evict(self._directory, self.EXTENSION, self._capacity)
+
+        except (IOError, OSError):
+            pass
+
+
+    @staticmethod
+    def _version():
+        return (About.VERSION, version_info[0])
+
+
+
+def save_atomically(entry, mode, save):
+    """
+    Let 'save' write into a temporary file with a unique name, next to
+    the given entry, and then move it in place, so that concurrent
+    writers never share a file and readers never see partial ones.
+    """
+    handle, temporary = mkstemp(dir=dirname(entry), suffix=".tmp")
+    try:
+        with fdopen(handle, mode) as stream:
+            save(stream)
+        try:
+            rename(temporary, entry)
+        except OSError:
+            # Windows does not replace existing files
+            remove(entry)
+            rename(temporary, entry)
+
+    except Exception:
+        if isfile(temporary):
+            remove(temporary)
+        raise
+
+
+
+def evict(directory, extension, capacity):
+    """
+    Remove the least recently used entries of the given directory, so
+    that at most 'capacity' of them remain.
+    """
+    entries = [join_paths(directory, each) \
+               for each in listdir(directory) \
+               if each.endswith(extension)]
+    entries.sort(key=getmtime)
+    while len(entries) > capacity:
+        try:
+            remove(entries.pop(0))
+        except OSError:
+            # Another process removed it already
+            pass
+
+
+
+def ozepy_version():
+    try:
+        from pkg_resources import get_distribution
+        return get_distribution("ozepy").version
+    except Exception:
+        return "unknown"
+
+
+
+def canonical_form(model):
+    """
+    A nested tuple that describes the given model, regardless of the
+    order in which its elements were declared.
+    """
+    def names(entities):
+        return tuple(sorted(each.name for each in entities))
+
+    def variable(each):
+        realization = tuple(sorted((tuple(sorted(s.targets)), s.pattern, tuple(s.replacements)) \
+                                   for s in each.realization))
+        return (each.name, str(each.value_type), repr(list(each.domain)), realization)
+
+    def component(each):
+        return (each.name,
+                names(each.provided_services),
+                names(each.required_services),
+                names(each.provided_features),
+                names(each.required_features),
+                tuple(sorted(variable(v) for v in each.variables)),
+                repr(each.implementation),
+                each.max_instances)
+
+    return (tuple(sorted(component(each) for each in model.components)),
+            names(model.goals.services),
+            names(model.goals.features),
+            tuple(each.strip() for each in model.constraints))
@@ -18,6 +18,14 @@ class Codec(object):
         raise NotImplementedError()
 
 
+    @property
+    def locations(self):
+        """
+        Where the entries of the last model loaded start, if known.
+        """
+        return {}
+
+
     def save_model(self, model, stream):
         raise NotImplementedError()
 
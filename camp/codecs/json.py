@@ -0,0 +1,62 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from __future__ import absolute_import
+
+from camp.codecs.commons import Codec
+from camp.codecs.yaml import YAML
+
+from json import dumps, loads
+
+
+
+class JSON(Codec):
+    """
+    Write configurations as compact JSON documents, one per line
+    (a.k.a. NDJSON), so that they can be streamed and read back as
+    they come. Documents have the same structure as the YAML ones.
+    """
+
+    def save_configuration(self, configuration, stream):
+        dictionary = YAML.as_dictionary(configuration)
+        stream.write(dumps(dictionary, sort_keys=True, separators=(",", ":")))
+        stream.write("\n")
+
+
+    def save_configurations(self, configurations, stream):
+        for each_configuration in configurations:
+            self.save_configuration(each_configuration, stream)
+
+
+    def load_configuration_from(self, model, stream):
+        return YAML.from_dictionary(model, _native(loads(stream.readline())))
+
+
+    def load_configurations_from(self, model, stream):
+        for each_line in stream:
+            if each_line.strip():
+                yield YAML.from_dictionary(model, _native(loads(each_line)))
+
+
+
+def _native(data):
+    """
+    Convert the unicode strings that the JSON parser returns (on
+    Python 2) into plain strings, as the YAML parser does.
+    """
+    if isinstance(data, dict):
+        return {_native(key): _native(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_native(each) for each in data]
+    if not isinstance(data, str) and isinstance(data, type(u"")):
+        return data.encode("utf-8")
+    return data
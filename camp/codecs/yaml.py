@@ -16,7 +16,15 @@ from camp.codecs.commons import Codec
 from camp.entities.model import Model, Component, Service, Goals, Variable, \
     Feature, DockerFile, DockerImage, Substitution, Instance, Configuration
 
-from yaml import safe_load as load_yaml, dump as yaml_dump
+from yaml import load as load_yaml, dump as yaml_dump, \
+    load_all as load_all_yaml, dump_all as yaml_dump_all, \
+    MappingNode, SequenceNode
+
+# Prefer the libyaml bindings, much faster, when they are available
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
 
 
@@ -38,15 +46,22 @@ class YAML(Codec):
 
     def __init__(self):
         self._warnings = []
+        self._locations = {}
 
 
     def save_configuration(self, configuration, stream):
-        dictionary = self._as_dictionary(configuration)
-        yaml_dump(dictionary, stream, default_flow_style=False)
+        dictionary = self.as_dictionary(configuration)
+        yaml_dump(dictionary, stream, Dumper=SafeDumper, default_flow_style=False)
+
+
+    def save_configurations(self, configurations, stream):
+        dictionaries = (self.as_dictionary(each) for each in configurations)
+        yaml_dump_all(dictionaries, stream, Dumper=SafeDumper,
+                      default_flow_style=False)
 
 
     @staticmethod
-    def _as_dictionary(configuration):
+    def as_dictionary(configuration):
         dictionary = {}
         dictionary[Keys.INSTANCES] = {}
         for each_instance in configuration.instances:
@@ -67,8 +82,21 @@ class YAML(Codec):
 
     @staticmethod
     def load_configuration_from(model, stream):
-        data = load_yaml(stream)
+        data = load_yaml(stream, Loader=SafeLoader)
+        return YAML.from_dictionary(model, data)
+
 
+    @staticmethod
+    def load_configurations_from(model, stream):
+        for each_document in load_all_yaml(stream, Loader=SafeLoader):
+            yield YAML.from_dictionary(model, each_document)
+
+
+    @staticmethod
+    def from_dictionary(model, data):
+        """
+        Build the configuration described by the given dictionary.
+        """
         instances = [ YAML._create_instance(model, key, item) \
                       for key, item in data[Keys.INSTANCES].items() ]
 
@@ -82,16 +110,16 @@ class YAML(Codec):
 
     @staticmethod
     def _create_instance(model, name, data):
-        definition = model.resolve(data[Keys.DEFINITION])
+        definition = model.component_named(data[Keys.DEFINITION])
+        if definition is None:
+            raise KeyError(data[Keys.DEFINITION])
         configuration = []
         if Keys.CONFIGURATION in data:
             for variable_name, value in data[Keys.CONFIGURATION].items():
-                for any_variable in definition.variables:
-                    if any_variable.name == variable_name:
-                        configuration.append((any_variable, value))
-                        break
-                else:
+                variable = model.variable_named(definition.name, variable_name)
+                if variable is None:
                     raise RuntimeError("Variable '%s' has no match in the model" % variable_name)
+                configuration.append((variable, value))
         return Instance(name, definition, configuration)
 
 
@@ -108,7 +136,7 @@ class YAML(Codec):
 
 
     def load_model_from(self, stream):
-        data = load_yaml(stream)
+        data = self._load_with_locations(stream)
         components = []
         goals = Goals()
         constraints = []
@@ -138,6 +166,42 @@ class YAML(Codec):
         return Model(components, goals, constraints)
 
 
+    def _load_with_locations(self, stream):
+        loader = SafeLoader(stream)
+        try:
+            node = loader.get_single_node()
+            data = loader.construct_document(node) if node else None
+        finally:
+            loader.dispose()
+        self._locations = {}
+        self._record_locations(node, [])
+        return data
+
+
+    def _record_locations(self, node, path):
+        if isinstance(node, MappingNode):
+            for key, value in node.value:
+                entry = path + [str(key.value)]
+                self._locations["/".join(entry)] = (key.start_mark.line + 1,
+                                                    key.start_mark.column + 1)
+                self._record_locations(value, entry)
+        elif isinstance(node, SequenceNode):
+            for index, each in enumerate(node.value, 1):
+                entry = path + ["#%d" % index]
+                self._locations["/".join(entry)] = (each.start_mark.line + 1,
+                                                    each.start_mark.column + 1)
+                self._record_locations(each, entry)
+
+
+    @property
+    def locations(self):
+        """
+        The line and column where each entry of the last model loaded
+        starts, indexed by path (e.g., 'components/server/variables').
+        """
+        return dict(self._locations)
+
+
     def _parse_components(self, data):
         components = []
         for key, item in data.items():
@@ -152,6 +216,7 @@ class YAML(Codec):
         required_features = []
         variables = []
         implementation = None
+        max_instances = 1
 
         for key, item in data.items():
 
@@ -195,6 +260,12 @@ class YAML(Codec):
                     continue
                 implementation = self._parse_implementation(name, item)
 
+            elif key == Keys.MAX_INSTANCES:
+                if not isinstance(item, int) or isinstance(item, bool):
+                    self._wrong_type(int, type(item), Keys.COMPONENTS, name, key)
+                    continue
+                max_instances = item
+
             else:
                 self._ignore(Keys.COMPONENTS, name, key)
 
@@ -205,7 +276,8 @@ class YAML(Codec):
                          provided_features=provided_features,
                          required_features=required_features,
                          variables=variables,
-                         implementation=implementation)
+                         implementation=implementation,
+                         max_instances=max_instances)
 
     @staticmethod
     def _escape(name):
@@ -404,6 +476,7 @@ class Keys:
     IMAGE = "image"
     IMPLEMENTATION = "implementation"
     INSTANCES = "instances"
+    MAX_INSTANCES = "max_instances"
     NAME = "name"
     PATTERN = "pattern"
     PROVIDES_FEATURES = "provides_features"
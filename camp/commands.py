@@ -10,7 +10,7 @@
 
 
 
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 
 from camp import About
 
@@ -42,9 +42,163 @@ class Command(object):
         generate.add_argument(
             "-c",
             "--coverage",
-            action="store_true",
+            nargs="?",
+            const=Generate.DEFAULT_COVERAGE_ENGINE,
+            choices=Generate.COVERAGE_ENGINES,
             dest="coverage",
             help="Generate only enough configurations to cover every single variations")
+        generate.add_argument(
+            "-t",
+            "--strength",
+            type=Command._positive_integer,
+            dest="strength",
+            help="the size of the combinations that the t-wise coverage covers")
+        generate.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            dest="jobs",
+            help="the number of worker processes used to enumerate configurations")
+        generate.add_argument(
+            "-i",
+            "--incremental",
+            action="store_true",
+            dest="incremental",
+            help="Reuse the configurations generated earlier, if they are still valid")
+        generate.add_argument(
+            "--solution-cache",
+            nargs="?",
+            const=Generate.DEFAULT_CACHE_DIRECTORY,
+            dest="cache",
+            help="Reuse the configurations cached for the very same model")
+        generate.add_argument(
+            "--solution-cache-size",
+            type=int,
+            dest="cache_size",
+            help="the maximum number of models whose configurations are cached")
+        generate.add_argument(
+            "-e",
+            "--estimate",
+            action="store_true",
+            dest="estimate",
+            help="Count the valid configurations instead of generating them")
+        generate.add_argument(
+            "-l",
+            "--limit",
+            type=Command._positive_integer,
+            dest="limit",
+            help="the maximum number of configurations to generate (or to count)")
+        generate.add_argument(
+            "-s",
+            "--sample",
+            type=Command._positive_integer,
+            dest="sample",
+            help="Generate only the given number of configurations, picked at random")
+        generate.add_argument(
+            "--seed",
+            type=int,
+            dest="seed",
+            help="the seed of the random sampling, to reproduce a sample")
+        generate.add_argument(
+            "--stream",
+            nargs="?",
+            const=Generate.STANDARD_OUTPUT,
+            dest="stream",
+            help="Write configurations as JSON lines to the given file (or to the standard output)")
+        generate.add_argument(
+            "-f",
+            "--formats",
+            type=Command._formats,
+            dest="formats",
+            help="the comma-separated formats of saved configurations (among %s)," \
+                 " YAML being always saved" % ", ".join(Generate.FORMATS))
+        generate.add_argument(
+            "--store",
+            choices=Generate.STORES,
+            dest="store",
+            help="Save configurations in 'config_N' folders or in a single SQLite database")
+        generate.add_argument(
+            "--server",
+            dest="server",
+            help="the address of a running 'camp serve' (e.g., http://localhost:8642)")
+        generate.add_argument(
+            "--token",
+            dest="token",
+            help="the token that the 'camp serve' given with --server expects")
+
+        serve = subparsers.add_parser(
+            "serve",
+            help="Serve the generation of configurations over HTTP")
+        serve.add_argument(
+            "--host",
+            dest="host",
+            help="the network interface to listen to")
+        serve.add_argument(
+            "-p",
+            "--port",
+            type=int,
+            dest="port",
+            help="the port to listen to")
+        serve.add_argument(
+            "--token",
+            dest="token",
+            help="the token that clients must send (random by default)")
+        serve.add_argument(
+            "--remote",
+            action="store_true",
+            dest="remote",
+            help="Accept a --host that other machines can reach")
+
+        render = subparsers.add_parser(
+            "render",
+            help="Render generated configurations as Graphviz graphs")
+        render.add_argument(
+            "-d",
+            "--directory",
+            dest="working_directory",
+            help="the directory that contains input files")
+        render.add_argument(
+            "-i",
+            "--indices",
+            type=int,
+            nargs="+",
+            dest="indices",
+            help="the index of the configurations to render (all by default)")
+        render.add_argument(
+            "--svg",
+            action="store_true",
+            dest="svg",
+            help="Also convert graphs into SVG, using the local 'dot' program")
+
+        export = subparsers.add_parser(
+            "export",
+            help="Export stored configurations into 'config_N' folders")
+        export.add_argument(
+            "-d",
+            "--directory",
+            dest="working_directory",
+            help="the directory that contains input files")
+        export.add_argument(
+            "-i",
+            "--indices",
+            type=int,
+            nargs="+",
+            dest="indices",
+            help="the index of the configurations to export (all by default)")
+        export.add_argument(
+            "--component",
+            dest="component",
+            help="Export only the configurations that include this component")
+        export.add_argument(
+            "--where",
+            type=Command._assignment,
+            dest="assignment",
+            help="Export only the configurations where VARIABLE=VALUE")
+        export.add_argument(
+            "--from",
+            dest="source",
+            metavar="FILE",
+            help="Export configurations streamed into this JSON lines file")
 
         realize = subparsers.add_parser(
             "realize",
@@ -77,7 +231,39 @@ class Command(object):
     def from_namespace(namespace):
         if namespace.command == "generate":
             return Generate(namespace.working_directory,
-                            namespace.coverage)
+                            namespace.coverage,
+                            namespace.jobs,
+                            namespace.incremental,
+                            namespace.cache,
+                            namespace.cache_size,
+                            namespace.strength,
+                            namespace.estimate,
+                            namespace.limit,
+                            namespace.sample,
+                            namespace.seed,
+                            namespace.server,
+                            namespace.stream,
+                            namespace.formats,
+                            namespace.store,
+                            namespace.token)
+
+        elif namespace.command == "render":
+            return Render(namespace.working_directory,
+                          namespace.indices,
+                          namespace.svg)
+
+        elif namespace.command == "export":
+            variable, value = namespace.assignment or (None, None)
+            return Export(namespace.working_directory,
+                          namespace.indices,
+                          namespace.component,
+                          variable,
+                          value,
+                          namespace.source)
+
+        elif namespace.command == "serve":
+            return Serve(namespace.host, namespace.port, namespace.token,
+                         namespace.remote)
 
         elif namespace.command == "realize":
             return Realize(namespace.working_directory,
@@ -91,6 +277,35 @@ class Command(object):
             raise NotImplementedError(message)
 
 
+    @staticmethod
+    def _formats(text):
+        formats = [each.strip() for each in text.split(",") if each.strip()]
+        for each_format in formats:
+            if each_format not in Generate.FORMATS:
+                raise ArgumentTypeError("invalid format '%s' (choose among %s)" \
+                                        % (each_format, ", ".join(Generate.FORMATS)))
+        return formats
+
+
+    @staticmethod
+    def _positive_integer(text):
+        try:
+            value = int(text)
+        except ValueError:
+            raise ArgumentTypeError("expected an integer, but found '%s'" % text)
+        if value <= 0:
+            raise ArgumentTypeError("expected a positive integer, but found '%s'" % text)
+        return value
+
+
+    @staticmethod
+    def _assignment(text):
+        if not "=" in text:
+            raise ArgumentTypeError("expected VARIABLE=VALUE, but found '%s'" % text)
+        variable, value = text.split("=", 1)
+        return variable.strip(), value.strip()
+
+
     def send_to(self, camp):
         message = "The method '{}.Command#send_to' should have been implemented!"
         raise NotImplementedError(message.format(__name__))
@@ -105,12 +320,62 @@ class Generate(Command):
     DEFAULT_WORKING_DIRECTORY = "temp/xwiki"
     DEFAULT_COVERAGE = True
 
-    def __init__(self, working_directory=None, coverage=None):
+    OPTIMIZE = "optimize"
+    GREEDY = "greedy"
+    T_WISE = "t-wise"
+    COVERAGE_ENGINES = [OPTIMIZE, GREEDY, T_WISE]
+    DEFAULT_COVERAGE_ENGINE = OPTIMIZE
+    DEFAULT_STRENGTH = 2
+    DEFAULT_JOBS = 1
+    DEFAULT_INCREMENTAL = False
+    DEFAULT_CACHE_DIRECTORY = "~/.camp/cache"
+    DEFAULT_CACHE_SIZE = 50
+    DEFAULT_ESTIMATE = False
+    DEFAULT_LIMIT = None
+    DEFAULT_SAMPLE = None
+    DEFAULT_SEED = None
+    STANDARD_OUTPUT = "-"
+    YAML = "yaml"
+    DOT = "dot"
+    JSON = "json"
+    FORMATS = [YAML, DOT, JSON]
+    DEFAULT_FORMATS = [YAML]
+    FOLDERS = "folders"
+    SQLITE = "sqlite"
+    STORES = [FOLDERS, SQLITE]
+    DEFAULT_STORE = FOLDERS
+
+    def __init__(self, working_directory=None, coverage=None, jobs=None,
+                 incremental=None, cache=None, cache_size=None,
+                 strength=None, estimate=None, limit=None, sample=None,
+                 seed=None, server=None, stream=None, formats=None,
+                 store=None, token=None):
         super(Generate, self).__init__()
         self._working_directory = working_directory or \
                                   self.DEFAULT_WORKING_DIRECTORY
         self._coverage = coverage \
                          if coverage is not None else self.DEFAULT_COVERAGE
+        self._coverage_engine = self._coverage \
+                                if self._coverage in self.COVERAGE_ENGINES \
+                                else self.DEFAULT_COVERAGE_ENGINE
+        self._jobs = jobs or self.DEFAULT_JOBS
+        self._incremental = incremental \
+                            if incremental is not None else self.DEFAULT_INCREMENTAL
+        self._cache = cache
+        self._cache_size = cache_size or self.DEFAULT_CACHE_SIZE
+        self._strength = strength or self.DEFAULT_STRENGTH
+        self._estimate = estimate \
+                         if estimate is not None else self.DEFAULT_ESTIMATE
+        self._limit = limit if limit is not None else self.DEFAULT_LIMIT
+        self._sample = sample if sample is not None else self.DEFAULT_SAMPLE
+        self._seed = seed if seed is not None else self.DEFAULT_SEED
+        self._server = server
+        self._stream = stream
+        # YAML files are what 'camp realize' and 'camp render' read
+        self._formats = self.DEFAULT_FORMATS + [each for each in formats or [] \
+                                                if not each in self.DEFAULT_FORMATS]
+        self._store = store or self.DEFAULT_STORE
+        self._token = token
 
 
     @property
@@ -120,13 +385,223 @@ class Generate(Command):
 
     @property
     def only_coverage(self):
-        return self._coverage
+        return self._coverage is not False
+
+
+    @property
+    def coverage_engine(self):
+        return self._coverage_engine
+
+
+    @property
+    def jobs(self):
+        return self._jobs
+
+
+    @property
+    def incremental(self):
+        return self._incremental
+
+
+    @property
+    def cache(self):
+        return self._cache
+
+
+    @property
+    def cache_size(self):
+        return self._cache_size
+
+
+    @property
+    def strength(self):
+        return self._strength
+
+
+    @property
+    def estimate(self):
+        return self._estimate
+
+
+    @property
+    def limit(self):
+        return self._limit
+
+
+    @property
+    def sample(self):
+        return self._sample
+
+
+    @property
+    def seed(self):
+        return self._seed
+
+
+    @property
+    def server(self):
+        return self._server
+
+
+    @property
+    def stream(self):
+        return self._stream
+
+
+    @property
+    def formats(self):
+        return [each for each in self._formats]
+
+
+    @property
+    def store(self):
+        return self._store
+
+
+    @property
+    def token(self):
+        return self._token
+
 
     def send_to(self, camp):
         camp.generate(self)
 
 
 
+class Render(Command):
+    """
+    Encapsulate calls to 'camp render ...'
+    """
+
+    DEFAULT_WORKING_DIRECTORY = "temp/xwiki"
+
+    def __init__(self, working_directory=None, indices=None, svg=False):
+        super(Render, self).__init__()
+        self._working_directory = working_directory or \
+                                  self.DEFAULT_WORKING_DIRECTORY
+        self._indices = indices
+        self._svg = svg
+
+
+    @property
+    def working_directory(self):
+        return self._working_directory
+
+
+    @property
+    def indices(self):
+        """
+        The index of the configurations to render, or None to render
+        them all.
+        """
+        return [each for each in self._indices] if self._indices else None
+
+
+    @property
+    def svg(self):
+        return self._svg
+
+
+    def send_to(self, camp):
+        camp.render(self)
+
+
+
+class Export(Command):
+    """
+    Encapsulate calls to 'camp export ...'
+    """
+
+    DEFAULT_WORKING_DIRECTORY = "temp/xwiki"
+
+    def __init__(self, working_directory=None, indices=None, component=None,
+                 variable=None, value=None, source=None):
+        super(Export, self).__init__()
+        self._working_directory = working_directory or \
+                                  self.DEFAULT_WORKING_DIRECTORY
+        self._indices = indices
+        self._component = component
+        self._variable = variable
+        self._value = value
+        self._source = source
+
+
+    @property
+    def working_directory(self):
+        return self._working_directory
+
+
+    @property
+    def indices(self):
+        return [each for each in self._indices] if self._indices else None
+
+
+    @property
+    def component(self):
+        return self._component
+
+
+    @property
+    def variable(self):
+        return self._variable
+
+
+    @property
+    def value(self):
+        return self._value
+
+
+    @property
+    def source(self):
+        return self._source
+
+
+    def send_to(self, camp):
+        camp.export(self)
+
+
+
+class Serve(Command):
+    """
+    Encapsulate calls to 'camp serve ...'
+    """
+
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 8642
+
+    def __init__(self, host=None, port=None, token=None, remote=False):
+        super(Serve, self).__init__()
+        self._host = host or self.DEFAULT_HOST
+        self._port = port if port is not None else self.DEFAULT_PORT
+        self._token = token
+        self._remote = remote
+
+
+    @property
+    def host(self):
+        return self._host
+
+
+    @property
+    def port(self):
+        return self._port
+
+
+    @property
+    def token(self):
+        return self._token
+
+
+    @property
+    def remote(self):
+        return self._remote
+
+
+    def send_to(self, camp):
+        camp.serve(self)
+
+
+
 class Realize(Command):
     """
     Encapsulate calls to 'camp realize ...'
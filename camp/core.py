@@ -10,38 +10,74 @@
 
 
 
+from camp.cache import SolutionCache
+from camp.codecs.json import JSON
 from camp.codecs.yaml import InvalidYAMLModel
+from camp.commands import Generate
 from camp.directories import InputDirectory, OutputDirectory, \
-    MissingModel, NoConfigurationFound
+    IndexedOutputDirectory, MissingModel, NoConfigurationFound
+from camp.entities.pruning import Pruning
 from camp.entities.validation import Checker, InvalidModel
 from camp.execute.parsers import ConfigINIParser
 from camp.execute.command.commands import ConductExperimentRunner
+from camp.serve import GenerationClient, GenerationServer, RemoteHostRefused
 from camp.ui import UI
 
-from sys import exc_info
+from itertools import islice
+
+from subprocess import CalledProcessError
+
+from sys import exc_info, stderr, stdout
 
 
 
 class Camp(object):
 
 
-    def __init__(self, codec, solver, realize):
+    def __init__(self, codec, solver, realize, ui=None, model_cache=None):
         self._codec = codec
+        self._model_cache = model_cache
         self._problem = solver
         self._builder = realize
         self._input = None
         self._output = None
-        self._ui = UI()
+        self._ui = ui or UI()
 
 
     def generate(self, arguments):
+        ui = self._ui
+        if arguments.stream == Generate.STANDARD_OUTPUT:
+            self._ui = UI(stderr)
+        try:
+            self._generate(arguments)
+
+        finally:
+            self._ui = ui
+
+
+    def _generate(self, arguments):
         self._ui.welcome()
         self._prepare_directories(arguments)
         try:
-            model = self._load_model()
-            configurations = self._generate_configurations(arguments, model)
-            for index, each_configuration in enumerate(configurations, 1):
-                self._save(index, each_configuration)
+            model = self._prune(self._load_model())
+            if arguments.estimate:
+                self._estimate(arguments, model)
+                return
+            first_index, configurations = \
+                self._generate_configurations(arguments, model)
+            configurations = enumerate(islice(configurations, arguments.limit),
+                                       first_index)
+            if arguments.stream:
+                count = self._stream(arguments.stream, configurations)
+            else:
+                if not isinstance(self._output, IndexedOutputDirectory):
+                    IndexedOutputDirectory.discard_from(self._output.path)
+                count = 0
+                for index, each_configuration in configurations:
+                    self._save(index, each_configuration, arguments.formats)
+                    count += 1
+            if count == arguments.limit:
+                self._ui.limit_reached(arguments.limit)
 
         except InvalidYAMLModel as error:
             self._ui.invalid_yaml_model(error)
@@ -56,34 +92,292 @@ class Camp(object):
             self._ui.unexpected_error(error)
 
         finally:
+            self._output.close()
             self._ui.goodbye()
 
 
     def _prepare_directories(self, arguments):
         self._input = InputDirectory(arguments.working_directory,
-                                               self._codec)
-        self._output = OutputDirectory(arguments.working_directory + "/out",
-                                               self._codec)
+                                     self._codec,
+                                     self._model_cache)
+        output_path = arguments.working_directory + "/out"
+        store = getattr(arguments, "store", None)
+        if store == Generate.SQLITE \
+           or (store is None and IndexedOutputDirectory.exists_in(output_path)):
+            self._output = IndexedOutputDirectory(output_path, self._codec)
+        else:
+            self._output = OutputDirectory(output_path, self._codec)
 
 
     def _load_model(self):
         path, model, warnings = self._input.model
         self._ui.model_loaded(path, model)
-        model.accept(Checker(workspace=self._input.path))
+        model.accept(Checker(workspace=self._input.path,
+                             locations=self._input.locations))
         return model
 
 
+    def _prune(self, model):
+        pruning = Pruning()
+        pruned_model = pruning.apply(model)
+        self._ui.model_pruned(pruning.removed_components,
+                              pruning.fixed_variables)
+        return pruned_model
+
+
+    def _estimate(self, arguments, model):
+        self._ui.upper_bound(model.upper_bound)
+        limit = arguments.limit or self.DEFAULT_COUNT_LIMIT
+        problem = self._problem.from_model(model, optimize=False)
+        self._ui.configurations_counted(problem.count(limit), limit)
+
+    DEFAULT_COUNT_LIMIT = 1000
+
+
+    def configurations_for(self, arguments, model):
+        """
+        Generate the configurations of the given model, as 'camp
+        generate' would, but without saving them. Return the index of
+        the first configuration, and the configurations themselves.
+        """
+        return self._generate_configurations(arguments, self._prune(model))
+
+
     def _generate_configurations(self, arguments, model):
-        problem = self._problem.from_model(model)
+        if arguments.server:
+            client = GenerationClient(arguments.server, arguments.token)
+            self._ui.configurations_requested(arguments.server)
+            return 1, client.configurations(model, self._input.model_text, arguments)
+        mode = self._mode_of(arguments)
+        if arguments.cache and not arguments.incremental and mode:
+            cache = SolutionCache(arguments.cache, arguments.cache_size)
+            configurations = cache.lookup(model, mode)
+            if configurations is not None:
+                self._ui.configurations_cached(cache.directory)
+                return 1, configurations
+            first_index, configurations = self._solve(arguments, model)
+            return first_index, cache.recording(model, mode, configurations)
+        return self._solve(arguments, model)
+
+
+    @staticmethod
+    def _mode_of(arguments):
+        if arguments.sample is not None:
+            if arguments.seed is None:
+                return None
+            return "sample/%d/%d" % (arguments.sample, arguments.seed)
+        if not arguments.only_coverage:
+            return "all"
+        if arguments.coverage_engine == Generate.T_WISE:
+            return "coverage/%s/%d" % (Generate.T_WISE, arguments.strength)
+        return "coverage/" + arguments.coverage_engine
+
+
+    def _solve(self, arguments, model):
+        if arguments.sample is not None:
+            problem = self._problem.from_model(model, optimize=False)
+            first_index = self._replay(arguments, problem, model)
+            return first_index, problem.sample(arguments.sample, arguments.seed)
         if arguments.only_coverage:
-            return  problem.coverage()
-        return problem.all_solutions()
+            engine = arguments.coverage_engine
+            problem = self._problem.from_model(model,
+                                               optimize=engine == Generate.OPTIMIZE)
+            first_index = self._replay(arguments, problem, model)
+            if engine == Generate.GREEDY:
+                return first_index, problem.greedy_coverage()
+            if engine == Generate.T_WISE:
+                return first_index, problem.greedy_coverage(arguments.strength)
+            return first_index, problem.coverage()
+        if not arguments.incremental:
+            return 1, self._problem.all_solutions_by_parts(model,
+                                                           arguments.jobs)
+        problem = self._problem.from_model(model, optimize=False)
+        first_index = self._replay(arguments, problem, model)
+        return first_index, problem.all_solutions()
+
+
+    def _replay(self, arguments, problem, model):
+        next_index = 1
+        if arguments.incremental:
+            for index, configuration in self._output.reusable_configurations(model):
+                next_index = max(next_index, index + 1)
+                if configuration and problem.replay(configuration):
+                    self._ui.configuration_reused(index)
+                else:
+                    self._ui.configuration_obsolete(index,
+                                                    self._output.retire(index))
+        return next_index
+
+
+    def _save(self, index, configuration, formats):
+        saved_files = []
+        if Generate.YAML in formats:
+            saved_files.append(self._output.save_as_yaml(index, configuration))
+        if Generate.DOT in formats:
+            saved_files.append(self._output.save_as_graphviz(index, configuration))
+        if Generate.JSON in formats:
+            saved_files.append(self._output.save_as_json(index, configuration))
+        self._ui.new_configuration(index, configuration, saved_files[0])
+
+
+    def render(self, arguments):
+        self._ui.welcome()
+        self._prepare_directories(arguments)
+        try:
+            model = self._load_model()
+            for path, each_configuration in self._load_configurations(model):
+                index = self._output.index_of(path)
+                if arguments.indices and not index in arguments.indices:
+                    continue
+                graphviz_file = self._output.save_as_graphviz(index,
+                                                              each_configuration)
+                self._ui.configuration_rendered(graphviz_file)
+                if arguments.svg:
+                    self._convert_to_svg(graphviz_file)
+
+        except InvalidYAMLModel as error:
+            self._ui.invalid_yaml_model(error)
+
+        except InvalidModel as error:
+            self._ui.invalid_model(error)
+
+        except MissingModel as error:
+            self._ui.missing_model(error)
+
+        except NoConfigurationFound as error:
+            self._ui.no_configuration_found(error)
+
+        except Exception as error:
+            self._ui.unexpected_error(error)
+
+        finally:
+            self._output.close()
+            self._ui.goodbye()
+
+
+    def _convert_to_svg(self, graphviz_file):
+        try:
+            svg_file = self._output.convert_to_svg(graphviz_file)
+            self._ui.configuration_rendered(svg_file)
+
+        except (OSError, CalledProcessError) as error:
+            self._ui.svg_conversion_failed(graphviz_file, error)
 
 
-    def _save(self, index, configuration):
-        self._output.save_as_graphviz(index, configuration)
-        yaml_file = self._output.save_as_yaml(index, configuration)
-        self._ui.new_configuration(index, configuration, yaml_file)
+    def serve(self, arguments):
+        self._ui.welcome()
+        try:
+            server = GenerationServer(self, arguments.host, arguments.port,
+                                      arguments.token, arguments.remote)
+
+        except RemoteHostRefused as error:
+            self._ui.remote_host_refused(error.host)
+            self._ui.goodbye()
+            return
+
+        try:
+            self._ui.server_started(server.address, server.token)
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            server.shutdown()
+            self._ui.goodbye()
+
+
+    def _stream(self, destination, configurations):
+        codec = JSON()
+        if destination == Generate.STANDARD_OUTPUT:
+            stream, name = stdout, "<stdout>"
+        else:
+            stream, name = open(destination, "w"), destination
+        count = 0
+        try:
+            for index, each_configuration in configurations:
+                codec.save_configuration(each_configuration, stream)
+                stream.flush()
+                self._ui.new_configuration(index, each_configuration, name)
+                count += 1
+
+        finally:
+            if stream is not stdout:
+                stream.close()
+
+        return count
+
+
+    def export(self, arguments):
+        self._ui.welcome()
+        self._prepare_directories(arguments)
+        try:
+            model = self._load_model()
+            if arguments.source:
+                exported = self._export_stream(arguments, model)
+            else:
+                exported = self._export_database(arguments, model)
+            for each_file in exported:
+                self._ui.configuration_exported(each_file)
+
+        except InvalidYAMLModel as error:
+            self._ui.invalid_yaml_model(error)
+
+        except InvalidModel as error:
+            self._ui.invalid_model(error)
+
+        except MissingModel as error:
+            self._ui.missing_model(error)
+
+        except NoConfigurationFound as error:
+            self._ui.no_configuration_found(error)
+
+        except Exception as error:
+            self._ui.unexpected_error(error)
+
+        finally:
+            self._output.close()
+            self._ui.goodbye()
+
+
+    def _export_database(self, arguments, model):
+        if not isinstance(self._output, IndexedOutputDirectory):
+            raise NoConfigurationFound(arguments.working_directory)
+        indices = self._output.indices(arguments.component,
+                                       arguments.variable,
+                                       arguments.value)
+        if arguments.indices:
+            indices = [each for each in indices if each in arguments.indices]
+        return self._output.export(model, indices)
+
+
+    def _export_stream(self, arguments, model):
+        """
+        Save as YAML, in 'config_N' folders, the configurations that
+        'camp generate --stream' wrote into the given file, where N is
+        the line of each configuration.
+        """
+        folders = OutputDirectory(self._output.path, self._codec)
+        with open(arguments.source) as stream:
+            configurations = JSON().load_configurations_from(model, stream)
+            for index, each_configuration in enumerate(configurations, 1):
+                if self._is_selected(arguments, index, each_configuration):
+                    yield folders.save_as_yaml(index, each_configuration)
+
+
+    @staticmethod
+    def _is_selected(arguments, index, configuration):
+        if arguments.indices and not index in arguments.indices:
+            return False
+        instances = [each for each in configuration.instances \
+                     if arguments.component is None \
+                     or each.definition.name == arguments.component]
+        if arguments.variable is None:
+            return len(instances) > 0
+        return any(variable.name == arguments.variable \
+                   and str(value) == str(arguments.value) \
+                   for each in instances \
+                   for variable, value in each.configuration)
 
 
     def realize(self, arguments):
@@ -113,6 +407,7 @@ class Camp(object):
             self._ui.unexpected_error(error)
 
         finally:
+            self._output.close()
             self._ui.goodbye()
 
 
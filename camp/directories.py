@@ -11,13 +11,25 @@
 
 
 from camp.codecs.graphviz import Graphviz
+from camp.codecs.json import JSON
 from camp.codecs.yaml import YAML
 
-from os import makedirs, listdir
-from os.path import exists, isdir, join as join_paths, dirname
+from os import makedirs, listdir, remove, rename
+from os.path import exists, isdir, isfile, join as join_paths, dirname
 
 from re import search, sub
 
+from shutil import rmtree
+
+from sqlite3 import connect
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from subprocess import check_call
+
 
 
 class NoConfigurationFound(Exception):
@@ -67,20 +79,40 @@ class Directory(object):
 class InputDirectory(Directory):
 
 
-    def __init__(self, path, codec=None):
+    def __init__(self, path, codec=None, cache=None):
         super(InputDirectory, self).__init__(path)
         self._codec = codec or YAML()
+        self._cache = cache
+        self._locations = {}
 
 
     @property
     def model(self):
         file_name = self._find_model()
         path = join_paths(self._path, file_name)
+        if self._cache:
+            model, self._locations, warnings = self._cache.load(path, self._codec)
+            return path, model, warnings
         with open(path, "r") as stream:
             model = self._codec.load_model_from(stream)
+            self._locations = self._codec.locations
             return path, model, self._codec.warnings
 
 
+    @property
+    def locations(self):
+        """
+        Where the entries of the model last read start.
+        """
+        return dict(self._locations)
+
+
+    @property
+    def model_text(self):
+        with open(join_paths(self._path, self._find_model()), "r") as stream:
+            return stream.read()
+
+
     def _find_model(self):
         for any_file in listdir(self._path):
             for any_valid_name in self.MODEL_NAMES:
@@ -131,6 +163,10 @@ class OutputDirectory(Directory):
         self._codec = codec or YAML()
 
 
+    def close(self):
+        pass
+
+
     def save_as_yaml(self, index, configuration):
         yaml_file = self._yaml_configuration_file(index)
         with open(yaml_file, "w") as stream:
@@ -170,20 +206,88 @@ class OutputDirectory(Directory):
         return join_paths(folder, "configuration.dot")
 
 
+    @staticmethod
+    def convert_to_svg(graphviz_file):
+        """
+        Convert the given Graphviz file into SVG, using the 'dot'
+        program. Raise OSError if 'dot' is not installed.
+        """
+        svg_file = sub(r"\.dot$", ".svg", graphviz_file)
+        check_call(["dot", "-Tsvg", graphviz_file, "-o", svg_file])
+        return svg_file
+
+
+    def save_as_json(self, index, configuration):
+        json_file = join_paths(self._folder_for_configuration(index),
+                               "configuration.json")
+        with open(json_file, "w") as stream:
+            JSON().save_configuration(configuration, stream)
+        return json_file
+
+
     def existing_configurations(self, model):
         if not isdir(self._path):
             folder = sub(r"out[\\\/]?$","", self._path)
             raise NoConfigurationFound(folder)
+        for path, yaml_file in self._configuration_files():
+            with open(yaml_file, "r") as stream:
+                configuration = self._codec.load_configuration_from(model, stream)
+                yield path, configuration
+
+    CONFIGURATION_FOLDER = r"config_([0-9]+)$"
+
+
+    def reusable_configurations(self, model):
+        """
+        Yield the index of each configuration generated earlier,
+        together with the configuration itself, or None if it no
+        longer matches the given model.
+        """
+        if not isdir(self._path):
+            return
+        for path, yaml_file in self._configuration_files():
+            index = self.index_of(path)
+            try:
+                with open(yaml_file, "r") as stream:
+                    configuration = self._codec.load_configuration_from(model, stream)
+            except (IOError, KeyError, RuntimeError):
+                configuration = None
+            yield index, configuration
+
+
+    def retire(self, index):
+        """
+        Move the given configuration aside, into the 'obsolete'
+        folder, so that other commands no longer see it. Return where
+        it went, or None if there was no such configuration.
+        """
+        folder = join_paths(self._path, "config_%d" % index)
+        if not isdir(folder):
+            return None
+        destination = join_paths(self._path, self.OBSOLETE, "config_%d" % index)
+        if isdir(destination):
+            rmtree(destination)
+        self._create(dirname(destination))
+        rename(folder, destination)
+        return destination
+
+    OBSOLETE = "obsolete"
+
+
+    @staticmethod
+    def index_of(path):
+        """
+        The index of the configuration stored in the given folder.
+        """
+        return int(search(OutputDirectory.CONFIGURATION_FOLDER, path).group(1))
+
+
+    def _configuration_files(self):
         for each_file in listdir(self._path):
             path = join_paths(self._path, each_file)
             if search(self.CONFIGURATION_FOLDER, path) \
                and isdir(path):
-                yaml_file = join_paths(path, self.YAML_CONFIGURATION)
-                with open(yaml_file, "r") as stream:
-                    configuration = self._codec.load_configuration_from(model, stream)
-                    yield path, configuration
-
-    CONFIGURATION_FOLDER = r"config_[0-9]+$"
+                yield path, join_paths(path, self.YAML_CONFIGURATION)
 
 
     def images_generated_for(self, index):
@@ -211,3 +315,173 @@ class OutputDirectory(Directory):
         resource = join_paths(self._path, path_to_file)
         with open(resource, "r") as stream:
             return stream.read()
+
+
+
+class IndexedOutputDirectory(OutputDirectory):
+    """
+    Store all configurations in a single SQLite database, instead of
+    one 'config_N' folder per configuration. The database indexes
+    configurations by component and by variable value, and gives
+    random access by index. Other files (e.g., Graphviz or realized
+    configurations) still go in 'config_N' folders.
+    """
+
+    DATABASE = "configurations.db"
+
+    def __init__(self, path, codec=None):
+        super(IndexedOutputDirectory, self).__init__(path, codec)
+        self._database = None
+        self._json = JSON()
+
+
+    @property
+    def database(self):
+        return join_paths(self._path, self.DATABASE)
+
+
+    @staticmethod
+    def exists_in(path):
+        return isfile(join_paths(path, IndexedOutputDirectory.DATABASE))
+
+
+    @staticmethod
+    def discard_from(path):
+        """
+        Remove the database left in the given directory, if any, so
+        that other commands read the configuration folders instead.
+        """
+        if IndexedOutputDirectory.exists_in(path):
+            remove(join_paths(path, IndexedOutputDirectory.DATABASE))
+
+
+    def _connection(self):
+        if self._database is None:
+            self._create(self._path)
+            self._database = connect(self.database)
+            self._database.execute("PRAGMA synchronous = NORMAL")
+            for each_statement in self.SCHEMA:
+                self._database.execute(each_statement)
+        return self._database
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS configurations ("
+        " id INTEGER PRIMARY KEY,"
+        " document TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS instances ("
+        " configuration INTEGER NOT NULL,"
+        " component TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS assignments ("
+        " configuration INTEGER NOT NULL,"
+        " component TEXT NOT NULL,"
+        " variable TEXT NOT NULL,"
+        " value TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS by_component"
+        " ON instances (component, configuration)",
+        "CREATE INDEX IF NOT EXISTS by_value"
+        " ON assignments (component, variable, value, configuration)"
+    ]
+
+
+    def close(self):
+        if self._database is not None:
+            self._database.close()
+            self._database = None
+
+
+    def save_as_yaml(self, index, configuration):
+        document = StringIO()
+        self._json.save_configuration(configuration, document)
+        database = self._connection()
+        with database:
+            self._delete(database, index)
+            database.execute("INSERT INTO configurations VALUES (?, ?)",
+                             (index, document.getvalue()))
+            for each_instance in configuration.instances:
+                component = each_instance.definition.name
+                database.execute("INSERT INTO instances VALUES (?, ?)",
+                                 (index, component))
+                for variable, value in each_instance.configuration:
+                    database.execute("INSERT INTO assignments VALUES (?, ?, ?, ?)",
+                                     (index, component, variable.name, str(value)))
+        return "%s#%d" % (self.database, index)
+
+
+    @staticmethod
+    def _delete(database, index):
+        for each_table in ["configurations", "instances", "assignments"]:
+            key = "id" if each_table == "configurations" else "configuration"
+            database.execute("DELETE FROM %s WHERE %s = ?" % (each_table, key),
+                             (index,))
+
+
+    def configuration_at(self, model, index):
+        """
+        The configuration stored with the given index. Raise KeyError
+        if there is no such configuration.
+        """
+        row = self._connection().execute(
+            "SELECT document FROM configurations WHERE id = ?",
+            (index,)).fetchone()
+        if row is None:
+            raise KeyError("No configuration with index %d" % index)
+        return self._json.load_configuration_from(model, StringIO(row[0]))
+
+
+    def indices(self, component=None, variable=None, value=None):
+        """
+        The index of the stored configurations, in increasing order.
+        Only those that include the given component, and that assign
+        the given value to the given variable, if any.
+        """
+        if component is None and variable is None:
+            query = "SELECT id FROM configurations ORDER BY id"
+            return [each for each, in self._connection().execute(query)]
+
+        table = "instances" if variable is None else "assignments"
+        clauses, parameters = [], []
+        if component is not None:
+            clauses.append("component = ?")
+            parameters.append(component)
+        if variable is not None:
+            clauses.extend(["variable = ?", "value = ?"])
+            parameters.extend([variable, str(value)])
+        query = "SELECT DISTINCT configuration FROM %s WHERE %s" \
+                " ORDER BY configuration" % (table, " AND ".join(clauses))
+        return [each for each, in self._connection().execute(query, parameters)]
+
+
+    def existing_configurations(self, model):
+        if not self.exists_in(self._path):
+            folder = sub(r"out[\\\/]?$","", self._path)
+            raise NoConfigurationFound(folder)
+        for index in self.indices():
+            yield join_paths(self._path, "config_%d" % index), \
+                self.configuration_at(model, index)
+
+
+    def reusable_configurations(self, model):
+        if not self.exists_in(self._path):
+            return
+        for index in self.indices():
+            try:
+                yield index, self.configuration_at(model, index)
+            except (KeyError, RuntimeError):
+                yield index, None
+
+
+    def retire(self, index):
+        database = self._connection()
+        with database:
+            self._delete(database, index)
+        return super(IndexedOutputDirectory, self).retire(index)
+
+
+    def export(self, model, indices):
+        """
+        Save the configurations with the given indices as YAML files,
+        in 'config_N' folders, and return the path of these files.
+        """
+        folders = OutputDirectory(self._path, self._codec)
+        return [folders.save_as_yaml(index, self.configuration_at(model, index)) \
+                for index in indices]
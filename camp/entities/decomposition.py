@@ -0,0 +1,117 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.model import Model, Goals
+
+from re import findall, finditer
+
+
+
+class Decomposition(object):
+    """
+    Split a model into parts that share no service and no feature,
+    so that each part can be solved separately. The first part gathers
+    all the components that provide services, because the goals and
+    the pending service they run couple them. The other parts can be
+    left out of a configuration, and solutions to every part
+    combine freely. Constraints merge the parts they name, and a
+    constraint that names no component at all (e.g., a bound on the
+    total number of instances) keeps the model in one piece.
+    """
+
+    def apply(self, model):
+        named = [self.components_named_in(model, each) \
+                 for each in model.constraints]
+        if any(not each for each in named):
+            return [model]
+
+        groups = self._connected_groups(model, named)
+        providers = set(each.name for each in model.components \
+                        if each.provided_services)
+        main = [each for each in groups if each & providers]
+        others = [each for each in groups if not each & providers]
+        if not main or not others:
+            return [model]
+
+        main_names = set(name for each in main for name in each)
+        parts = [self._part_of(model, named, main_names, model.goals)]
+        for each_group in sorted(others, key=min):
+            parts.append(self._part_of(model, named, each_group, Goals()))
+        return parts
+
+
+    @staticmethod
+    def components_named_in(model, constraint):
+        """
+        The names of the components that the given constraint refers
+        to, either directly, through the services and features they
+        provide, or through the identifiers of their instances and
+        variables (e.g., 'server_0' or 'server_0_memory').
+        """
+        names = set()
+        for each_identifier in findall(r"[A-Za-z_][A-Za-z0-9_]*", constraint):
+            if model.component_named(each_identifier):
+                names.add(each_identifier)
+                continue
+            for each_match in finditer(r"_[0-9]+(?=_|$)", each_identifier):
+                prefix = each_identifier[:each_match.start()]
+                if model.component_named(prefix):
+                    names.add(prefix)
+                    break
+            else:
+                try:
+                    entity = model.resolve(each_identifier)
+                    names.update(each.name for each in model.providers_of(entity))
+                except KeyError:
+                    pass
+        return names
+
+
+    def _connected_groups(self, model, named):
+        self._parent = {each.name: each.name for each in model.components}
+
+        for each_component in model.components:
+            for each_required in each_component.required_services \
+                                 + each_component.required_features:
+                for each_provider in model.providers_of(each_required):
+                    self._merge(each_component.name, each_provider.name)
+
+        for each_names in named:
+            names = sorted(each_names)
+            for each_name in names[1:]:
+                self._merge(names[0], each_name)
+
+        groups = {}
+        for each_name in self._parent:
+            groups.setdefault(self._root_of(each_name), set()).add(each_name)
+        return list(groups.values())
+
+
+    def _merge(self, name, other_name):
+        self._parent[self._root_of(name)] = self._root_of(other_name)
+
+
+    def _root_of(self, name):
+        while self._parent[name] != name:
+            self._parent[name] = self._parent[self._parent[name]]
+            name = self._parent[name]
+        return name
+
+
+    @staticmethod
+    def _part_of(model, named, names, goals):
+        constraints = [each_constraint \
+                       for each_constraint, each_names in zip(model.constraints, named) \
+                       if each_names & names]
+        return Model([each for each in model.components if each.name in names],
+                     goals,
+                     constraints)
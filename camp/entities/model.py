@@ -16,6 +16,7 @@ from logging import warning
 
 class Visitee(object):
 
+    __slots__ = ()
 
     def accept(self, visitor, *context):
         """
@@ -37,6 +38,7 @@ class NamedElement(Visitee):
     Abstract the name that all entities have.
     """
 
+    __slots__ = ("_name",)
     def __init__(self, name):
         if not isinstance(name, str):
             raise AssertionError("name must be a string!")
@@ -51,66 +53,97 @@ class NamedElement(Visitee):
 
 class Model(Visitee):
 
+    __slots__ = ("_components", "_goals", "_constraints", "_variables",
+                 "_providers", "_services", "_features", "_component_list",
+                 "_services_by_name", "_features_by_name")
+
     def __init__(self, components, goals, constraints=None):
         self._components = {each.name: each for each in components}
         self._goals = goals
-        self._constraints = constraints or []
+        self._constraints = tuple(constraints or ())
+        self._index()
+
+
+    def _index(self):
+        """
+        Index services, features, variables and providers by name,
+        once and for all: Models do not change once built.
+        """
+        services = list(self._goals.services)
+        features = list(self._goals.features)
+        self._variables = {}
+        self._providers = {}
+        for each_component in self._components.values():
+            services.extend(each_component.provided_services)
+            services.extend(each_component.required_services)
+            features.extend(each_component.provided_features)
+            features.extend(each_component.required_features)
+            for each_variable in each_component.variables:
+                key = (each_component.name, each_variable.name)
+                self._variables[key] = each_variable
+            for each_provided in each_component.provided_services \
+                                 + each_component.provided_features:
+                self._providers.setdefault(each_provided, []).append(each_component)
+
+        self._services = tuple(set(services))
+        self._features = tuple(set(features))
+        self._component_list = tuple(self._components.values())
+        self._services_by_name = {each.name: each for each in self._services}
+        self._features_by_name = {each.name: each for each in self._features}
 
 
     def resolve(self, identifier):
         if identifier in self._components:
             return self._components[identifier]
 
-        for any_service in self.services:
-            if any_service.name == identifier:
-                return any_service
+        if identifier in self._services_by_name:
+            return self._services_by_name[identifier]
 
-        for any_feature in self.features:
-            if any_feature.name == identifier:
-                return any_feature
+        if identifier in self._features_by_name:
+            return self._features_by_name[identifier]
 
-        else:
-            raise KeyError(identifier)
+        raise KeyError(identifier)
 
 
     def __contains__(self, item):
         if isinstance(item, Feature):
-            return item in self.features
+            return self._features_by_name.get(item.name) == item
         elif isinstance(item, Component):
             return item.name in self._components
         elif isinstance(item, Service):
-            return item in self.services
+            return self._services_by_name.get(item.name) == item
         else:
             return None
 
 
     @property
     def services(self):
-        services = []
-        for each_component in self._components.values():
-            services.extend(each_component.provided_services)
-            services.extend(each_component.required_services)
-        services.extend(self._goals.services)
-        return list(set(services))
+        return self._services
 
 
     @property
     def features(self):
-        features = []
-        for each_component in self._components.values():
-            features.extend(each_component.provided_features)
-            features.extend(each_component.required_features)
-        features.extend(self._goals.features)
-        return list(set(features))
+        return self._features
 
 
     def component_named(self, name):
         return self._components.get(name, None)
 
 
+    def variable_named(self, component_name, variable_name):
+        return self._variables.get((component_name, variable_name), None)
+
+
+    def providers_of(self, service_or_feature):
+        """
+        The components that provide the given service or feature.
+        """
+        return [each for each in self._providers.get(service_or_feature, [])]
+
+
     @property
     def components(self):
-        return [each for each in self._components.values()]
+        return self._component_list
 
 
     @property
@@ -123,12 +156,50 @@ class Model(Visitee):
         return self._constraints
 
 
+    @property
+    def upper_bound(self):
+        """
+        An upper bound on the number of configurations, computed from
+        the variable domains and from the candidate partners of each
+        component, or None if some variable has no domain. Instances
+        of the same component count as distinct, as the solver may
+        tell them apart, so that the bound holds with or without
+        symmetry breaking.
+        """
+        bound = 1
+        for each_component in self._components.values():
+            shapes = self._shapes_of(each_component)
+            if shapes is None:
+                return None
+            bound *= (shapes + 1) ** each_component.max_instances
+        return bound
+
+
+    def _shapes_of(self, component):
+        shapes = 1
+        for each_variable in component.variables:
+            if not each_variable.domain:
+                return None
+            shapes *= len(each_variable.domain)
+        for each_service in component.required_services:
+            shapes *= self._providers_of(each_service)
+        for each_feature in component.required_features:
+            shapes *= self._providers_of(each_feature)
+        return shapes
+
+
+    def _providers_of(self, service_or_feature):
+        return sum(each.max_instances \
+                   for each in self.providers_of(service_or_feature))
+
 
 class Service(NamedElement):
     """
     Immutable value object.
     """
 
+    __slots__ = ()
+
     def __init__(self, name):
         super(Service, self).__init__(name)
 
@@ -153,6 +224,7 @@ class Feature(NamedElement):
     Immutable value object.
     """
 
+    __slots__ = ()
 
     def __init__(self, name):
         super(Feature, self).__init__(name)
@@ -174,6 +246,14 @@ class Feature(NamedElement):
 
 
 class Component(NamedElement):
+    """
+    Immutable: collections are kept as tuples, which accessors return
+    as they are.
+    """
+
+    __slots__ = ("_required_features", "_provided_features",
+                 "_required_services", "_provided_services",
+                 "_variables", "_implementation", "_max_instances")
 
 
     def __init__(self, name,
@@ -182,44 +262,41 @@ class Component(NamedElement):
                  provided_services=None,
                  required_services=None,
                  variables=None,
-                 implementation=None):
+                 implementation=None,
+                 max_instances=1):
         super(Component, self).__init__(name)
-        self._required_features = [each for each in required_features] \
-                                  if required_features else []
-        self._provided_features = [each for each in provided_features] \
-                                  if provided_features else []
-        self._required_services = [each for each in required_services] \
-                                  if required_services else []
-        self._provided_services = [each for each in provided_services] \
-                                  if provided_services else []
-        self._variables = {each.name: each for each in variables} \
-                          if variables else {}
+        self._required_features = tuple(required_features or ())
+        self._provided_features = tuple(provided_features or ())
+        self._required_services = tuple(required_services or ())
+        self._provided_services = tuple(provided_services or ())
+        self._variables = tuple(variables or ())
         self._implementation = implementation
+        self._max_instances = max_instances
 
 
     @property
     def required_features(self):
-        return [each for each in self._required_features]
+        return self._required_features
 
 
     @property
     def provided_features(self):
-        return [each for each in self._provided_features]
+        return self._provided_features
 
 
     @property
     def required_services(self):
-        return [each for each in self._required_services]
+        return self._required_services
 
 
     @property
     def provided_services(self):
-        return [each for each in self._provided_services]
+        return self._provided_services
 
 
     @property
     def variables(self):
-        return [each for each in self._variables.values()]
+        return self._variables
 
 
     @property
@@ -227,9 +304,15 @@ class Component(NamedElement):
         return self._implementation
 
 
+    @property
+    def max_instances(self):
+        return self._max_instances
+
+
 
 class Variable(NamedElement):
 
+    __slots__ = ("_value_type", "_values", "_realization")
 
     @staticmethod
     def cover(minimum, maximum, coverage):
@@ -247,9 +330,8 @@ class Variable(NamedElement):
     def __init__(self, name, value_type, values, realization=None):
         super(Variable, self).__init__(name)
         self._value_type = value_type
-        self._values = [each for each in values]
-        self._realization = [each for each in realization] \
-                            if realization else []
+        self._values = tuple(values)
+        self._realization = tuple(realization or ())
 
     @property
     def value_type(self):
@@ -258,12 +340,12 @@ class Variable(NamedElement):
 
     @property
     def domain(self):
-        return [each for each in self._values]
+        return self._values
 
 
     @property
     def realization(self):
-        return [each for each in self._realization]
+        return self._realization
 
 
     def value_at(self, index):
@@ -273,17 +355,26 @@ class Variable(NamedElement):
             return index
 
 
+    def index_of(self, value):
+        if self._value_type != "Integer" and len(self._values) > 0:
+            return self._values.index(value)
+        else:
+            return value
+
+
 
 class Substitution(Visitee):
     """
     Value object
     """
 
+    __slots__ = ("_targets", "_pattern", "_replacements")
+
 
     def __init__(self, targets, pattern, replacements):
         if not all(isinstance(t, str) for t in targets):
             raise AssertionError("Targets must be string objects!")
-        self._targets = targets
+        self._targets = tuple(targets)
 
         if not isinstance(pattern, str):
             raise AssertionError("Pattern must be a string object")
@@ -291,12 +382,12 @@ class Substitution(Visitee):
 
         if not all(isinstance(r, str) for r in replacements):
             raise AssertionError("Replacements must be string objects!")
-        self._replacements = replacements
+        self._replacements = tuple(replacements)
 
 
     @property
     def targets(self):
-        return [each for each in self._targets]
+        return self._targets
 
 
     @property
@@ -306,7 +397,7 @@ class Substitution(Visitee):
 
     @property
     def replacements(self):
-        return [each for each in self._replacements]
+        return self._replacements
 
 
     def __eq__(self, other):
@@ -322,12 +413,13 @@ class Substitution(Visitee):
             tuple(
                 sorted(self._targets) \
                 + [self._pattern] \
-                + self._replacements))
+                + list(self._replacements)))
 
 
 
 class Implementation(Visitee):
-    pass
+
+    __slots__ = ()
 
 
 
@@ -336,6 +428,8 @@ class DockerFile(Implementation):
     Value objects
     """
 
+    __slots__ = ("_docker_file",)
+
     def __init__(self, file_path):
         if not isinstance(file_path, str):
             raise AssertionError(self.WRONG_TYPE % type(file_path))
@@ -369,6 +463,8 @@ class DockerImage(Implementation):
     Value objects
     """
 
+    __slots__ = ("_docker_image",)
+
     def __init__(self, image):
         if not isinstance(image, str):
             raise AssertionError(self.WRONG_TYPE % type(image))
@@ -398,13 +494,23 @@ class DockerImage(Implementation):
 
 
 class Instance(NamedElement):
+    """
+    Instances also keep track of the instances they host and of those
+    that use their service, so that neither needs a search.
+    """
+
+    __slots__ = ("_definition", "_feature_provider", "_service_providers",
+                 "_configuration", "_hosted", "_consumers", "_revision")
 
     def __init__(self, name, definition, configuration=None):
         super(Instance, self).__init__(name)
         self._definition = definition
         self._feature_provider = None
-        self._service_providers = []
-        self._configuration = configuration if configuration else []
+        self._service_providers = ()
+        self._configuration = tuple(configuration or ())
+        self._hosted = []
+        self._consumers = []
+        self._revision = 0
 
     @property
     def definition(self):
@@ -418,7 +524,11 @@ class Instance(NamedElement):
 
     @service_providers.setter
     def service_providers(self, new_providers):
-        self._service_providers = new_providers
+        for each_provider in self._service_providers:
+            each_provider._consumers.remove(self)
+        self._service_providers = tuple(new_providers)
+        for each_provider in self._service_providers:
+            each_provider._consumers.append(self)
 
 
     @property
@@ -428,7 +538,39 @@ class Instance(NamedElement):
 
     @feature_provider.setter
     def feature_provider(self, new_provider):
+        if self._feature_provider:
+            self._feature_provider._hosted.remove(self)
+            self._feature_provider._revision += 1
         self._feature_provider = new_provider
+        if self._feature_provider:
+            self._feature_provider._hosted.append(self)
+            self._feature_provider._revision += 1
+        self._revision += 1
+
+
+    @property
+    def revision(self):
+        """
+        Incremented whenever this instance changes its feature provider,
+        or gains or loses a hosted instance.
+        """
+        return self._revision
+
+
+    @property
+    def hosted_instances(self):
+        """
+        The instances whose feature provider is this one.
+        """
+        return tuple(self._hosted)
+
+
+    @property
+    def consumers(self):
+        """
+        The instances that use the service of this one.
+        """
+        return tuple(self._consumers)
 
 
     @property
@@ -438,7 +580,22 @@ class Instance(NamedElement):
 
     @configuration.setter
     def configuration(self, new_configuration):
-        self._configuration = new_configuration
+        self._configuration = tuple(new_configuration)
+
+
+    @property
+    def signature(self):
+        feature_provider = self._feature_provider.name \
+                           if self._feature_provider else None
+        service_providers = tuple(sorted(each.name \
+                                         for each in self._service_providers))
+        configuration = tuple(sorted((variable.name, str(value)) \
+                                     for variable, value in self._configuration))
+        return (self._name,
+                self._definition.name,
+                feature_provider,
+                service_providers,
+                configuration)
 
 
     def __getitem__(self, key):
@@ -451,16 +608,24 @@ class Instance(NamedElement):
 
 class Configuration(Visitee):
 
+    __slots__ = ("_instances", "_ordered_instances", "_stacks", "_stacks_revision")
+
 
     def __init__(self, model, instances=None):
-        self._instances = {each.name:each for each in instances} \
-                          if instances else {}
+        self._ordered_instances = tuple(instances or ())
+        self._instances = {each.name: each for each in self._ordered_instances}
+        self._stacks = None
+        self._stacks_revision = None
 
 
     def resolve(self, identifier):
         return self._instances[identifier]
 
 
+    def __contains__(self, identifier):
+        return identifier in self._instances
+
+
     @property
     def instance_count(self):
         return len(self._instances)
@@ -468,42 +633,86 @@ class Configuration(Visitee):
 
     @property
     def instances(self):
-        return [ each for each in self._instances.values() ]
+        return self._ordered_instances
+
+
+    @property
+    def signature(self):
+        """
+        A hashable summary of the configuration, which two
+        configurations share only if they are equivalent.
+        """
+        return frozenset(each.signature for each in self._instances.values())
+
+
+    def _includes(self, instance):
+        return self._instances.get(instance.name) is instance
 
 
     @property
     def stacks(self):
-        def top_services():
-            for each in self.instances:
-                if all(not i.feature_provider is each for i in self.instances):
-                    yield each
+        """
+        The chains of instances, from each instance that hosts no other
+        down to the bottom of its stack. Computed once, until one of
+        its instances changes its feature provider or what it hosts.
+        """
+        revision = self._revision()
+        if self._stacks is None or self._stacks_revision != revision:
+            self._stacks = tuple(self._stack_of(each) \
+                                 for each in self._ordered_instances \
+                                 if not any(self._includes(i) \
+                                            for i in each.hosted_instances))
+            self._stacks_revision = revision
+        return self._stacks
+
 
-        def stack_of(service):
-            stack = [service]
-            while stack[-1].feature_provider:
-                stack.append(stack[-1].feature_provider)
-            return stack
+    def _revision(self):
+        # Revisions only grow, so their sum changes with any of them
+        return sum(each.revision for each in self._ordered_instances)
 
-        for each_service in top_services():
-            yield stack_of(each_service)
+
+    @staticmethod
+    def _stack_of(instance):
+        stack = [instance]
+        while stack[-1].feature_provider:
+            stack.append(stack[-1].feature_provider)
+        return tuple(stack)
+
+
+    @property
+    def hosting_order(self):
+        """
+        The instances that host or are hosted by another one, each host
+        before the instances it hosts.
+        """
+        ordered = []
+        seen = set()
+        for each_stack in self.stacks:
+            if len(each_stack) < 2:
+                continue
+            for each_instance in reversed(each_stack):
+                if not each_instance.name in seen:
+                    seen.add(each_instance.name)
+                    ordered.append(each_instance)
+        return ordered
 
 
 
 class Goals(object):
 
+    __slots__ = ("_services", "_features")
+
 
     def __init__(self, services=None, features=None):
-        self._services = [each for each in services] \
-                         if services else []
-        self._features = [each for each in features] \
-                         if features else []
+        self._services = tuple(services or ())
+        self._features = tuple(features or ())
 
 
     @property
     def services(self):
-        return [each for each in self._services]
+        return self._services
 
 
     @property
     def features(self):
-        return [each for each in self._features]
+        return self._features
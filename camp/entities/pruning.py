@@ -0,0 +1,193 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.decomposition import Decomposition
+from camp.entities.model import Model
+
+from collections import deque
+
+
+
+class Pruning(object):
+    """
+    Remove from a model the components that no valid configuration
+    can include, before the model is handed over to the solver. A
+    component is removed if:
+
+     - it requires a service that no other component provides;
+
+     - no single component provides all the features it requires;
+
+     - it provides features, but no component could be deployed on
+       it, as provided features must be used;
+
+     - it provides services that nothing consumes, while an instance
+       of the goals is always left unconsumed as well: a
+       configuration has only one such pending service.
+
+    Components that constraints name are always kept, be it directly,
+    through their instances and variables (e.g., 'server_0_memory'),
+    or through the services and features they provide.
+    """
+
+    def __init__(self):
+        self._removed_components = []
+        self._fixed_variables = []
+
+
+    @property
+    def removed_components(self):
+        return [each for each in self._removed_components]
+
+
+    @property
+    def fixed_variables(self):
+        return [each for each in self._fixed_variables]
+
+
+    def apply(self, model):
+        kept = _Search(model).possible_components()
+        self._removed_components = sorted(each.name \
+                                          for each in model.components \
+                                          if not each.name in kept)
+        self._fixed_variables = sorted("%s::%s" % (each.name, v.name) \
+                                       for each in model.components \
+                                       if each.name in kept \
+                                       for v in each.variables \
+                                       if len(v.domain) == 1)
+        if not self._removed_components:
+            return model
+        return Model([each for each in model.components if each.name in kept],
+                     model.goals,
+                     model.constraints)
+
+
+
+class _Search(object):
+    """
+    Remove impossible components one at a time, and check again only
+    the neighbours of each removed component, through the providers
+    and consumers of what it requires and provides.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self._kept = set(each.name for each in model.components)
+        self._named = set(each_name \
+                          for each in model.constraints \
+                          for each_name in Decomposition.components_named_in(model, each))
+        self._consumers = {}
+        for each_component in model.components:
+            for each_required in self._required(each_component):
+                self._consumers.setdefault(each_required, []).append(each_component)
+        self._goal_always_pending = self._goals_are_always_pending()
+
+
+    def possible_components(self):
+        pending = deque(self._model.components)
+        queued = set(self._kept)
+        while pending:
+            component = pending.popleft()
+            queued.discard(component.name)
+            if not component.name in self._kept \
+               or component.name in self._named \
+               or self._is_possible(component):
+                continue
+            self._kept.discard(component.name)
+            neighbours = self._neighbours_of(component)
+            if not self._goal_always_pending and self._goals_are_always_pending():
+                self._goal_always_pending = True
+                neighbours = self._model.components
+            for each_neighbour in neighbours:
+                if each_neighbour.name in self._kept \
+                   and not each_neighbour.name in queued:
+                    queued.add(each_neighbour.name)
+                    pending.append(each_neighbour)
+        return set(self._kept)
+
+
+    def _is_possible(self, component):
+        for each_service in component.required_services:
+            if not self._kept_among(self._model.providers_of(each_service)):
+                return False
+
+        if component.required_features:
+            hosts = self._model.providers_of(component.required_features[0])
+            if not any(self._can_host(each, component) \
+                       for each in self._kept_among(hosts)):
+                return False
+
+        if component.provided_features:
+            goals = self._model.goals.features
+            if not any(each in goals for each in component.provided_features) \
+               and not any(self._can_host(component, each) \
+                           for each in self._kept_consumers_of(component.provided_features)):
+                return False
+
+        if component.provided_services and self._goal_always_pending:
+            goals = self._model.goals.services
+            if not any(each in goals for each in component.provided_services) \
+               and not self._kept_consumers_of(component.provided_services):
+                return False
+
+        return True
+
+
+    def _goals_are_always_pending(self):
+        """
+        True if no component left could consume the instance that
+        provides a running service.
+        """
+        goals = self._model.goals.services
+        if not goals:
+            return False
+        for each_goal in goals:
+            for each_provider in self._kept_among(self._model.providers_of(each_goal)):
+                if self._kept_consumers_of(each_provider.provided_services):
+                    return False
+        return True
+
+
+    def _neighbours_of(self, component):
+        neighbours = []
+        for each_required in self._required(component):
+            neighbours.extend(self._model.providers_of(each_required))
+        for each_provided in self._provided(component):
+            neighbours.extend(self._consumers.get(each_provided, []))
+        return neighbours
+
+
+    def _kept_among(self, components):
+        return [each for each in components if each.name in self._kept]
+
+
+    def _kept_consumers_of(self, services_or_features):
+        return [each \
+                for each_provided in services_or_features \
+                for each in self._consumers.get(each_provided, []) \
+                if each.name in self._kept]
+
+
+    @staticmethod
+    def _can_host(host, guest):
+        return all(each in host.provided_features \
+                   for each in guest.required_features)
+
+
+    @staticmethod
+    def _provided(component):
+        return component.provided_services + component.provided_features
+
+
+    @staticmethod
+    def _required(component):
+        return component.required_services + component.required_features
@@ -10,6 +10,10 @@
 
 
 
+from camp.entities.model import Service
+
+from ast import Attribute, Name, parse, walk
+
 from os.path import isfile, join as join_paths
 
 
@@ -31,14 +35,27 @@ class Error(object):
     def __init__(self, problem, hint):
         self._problem = problem
         self._hint = hint
+        self._path = None
+        self._location = None
 
 
     def __repr__(self):
+        if self._location:
+            line, column = self._location
+            return self.LOCATED_TEMPLATE % (self._problem,
+                                            self._path,
+                                            line,
+                                            column,
+                                            self._hint)
         return self.TEMPLATE % (self._problem, self._hint)
 
     TEMPLATE = ("Error: %s\n"
                 "       %s\n")
 
+    LOCATED_TEMPLATE = ("Error: %s\n"
+                        "       See '%s' (line %d, column %d).\n"
+                        "       %s\n")
+
 
     @property
     def hint(self):
@@ -50,6 +67,34 @@ class Error(object):
         return self._problem
 
 
+    @property
+    def path(self):
+        return self._path
+
+
+    @property
+    def location(self):
+        """
+        The (line, column) where the faulty entry starts in the model,
+        or None if unknown.
+        """
+        return self._location
+
+
+    def locate(self, path, location):
+        self._path = path
+        self._location = location
+
+
+
+class NoServiceAndNoFeature(Error):
+
+    def __init__(self):
+        super(NoServiceAndNoFeature, self).__init__(
+            "No service and no feature is defined.",
+            "Define at least one component that provides something.")
+
+
 
 class NoGoal(Error):
 
@@ -95,6 +140,19 @@ class EmptyVariableDomain(Error):
 
 
 
+class InvalidInstanceBound(Error):
+
+
+    def __init__(self, component):
+        super(InvalidInstanceBound, self).__init__(
+            self.PROBLEM % (component.name, component.max_instances),
+            self.HINT)
+
+    PROBLEM = "Component '%s' allows %d instance(s)!"
+    HINT = "Components must allow at least one instance."
+
+
+
 class DockerFileNotFound(Error):
 
     def __init__(self, component, docker_file, workspace):
@@ -107,112 +165,142 @@ class DockerFileNotFound(Error):
 
 
 
-class Checker(object):
+class UnsafeConstraint(Error):
 
-    def __init__(self, workspace=None):
+    def __init__(self, constraint, identifier):
+        super(UnsafeConstraint, self).__init__(
+            self.PROBLEM % (constraint.strip(), identifier),
+            self.HINT)
+
+    PROBLEM = "Constraint '%s' uses the forbidden identifier '%s'!"
+    HINT = "Names, attributes and keys cannot start with '_'."
+
+
+
+def unsafe_identifiers(constraint):
+    """
+    The names, attributes and string keys of the given constraint that
+    start with '_', which could reach Python internals once evaluated.
+    Constraints that do not parse have none: evaluating them fails
+    anyway.
+    """
+    try:
+        tree = parse(constraint.strip(), mode="eval")
+    except SyntaxError:
+        return []
+    identifiers = []
+    for each_node in walk(tree):
+        if isinstance(each_node, Name):
+            identifiers.append(each_node.id)
+        elif isinstance(each_node, Attribute):
+            identifiers.append(each_node.attr)
+        elif isinstance(getattr(each_node, "s", None), str):
+            identifiers.append(each_node.s)
+    return [each for each in identifiers if each.startswith("_")]
+
+
+
+class Checker(object):
+    """
+    Check a model in a single pass over its components, indexing on
+    the way what they provide and require. When given the locations
+    of the YAML entries (see YAML.locations), errors point to the
+    entries they come from.
+
+    There is no incremental mode, which would only check again the
+    components that changed: the rules on a single component (its
+    instance bound and its variable domains) cost less than telling
+    whether it changed, and the rules on providers and consumers
+    involve the whole model anyway.
+    """
+
+    def __init__(self, workspace=None, locations=None):
         self._workspace = workspace or "temp"
+        self._locations = locations or {}
         self._errors = []
 
 
     def visit_model(self, model):
         self._errors = []
-        self._at_least_one_service_or_feature(model)
-        self._at_least_one_goal(model)
+        self._provided = set()
+        self._consumers = {}
 
-        for each_service in model.services:
-            each_service.accept(self, model)
-
-        for each_feature in model.features:
-            each_feature.accept(self, model)
+        self._at_least_one_goal(model)
+        for each_service in model.goals.services:
+            self._consumers.setdefault(each_service, "goals/running")
+        for each_feature in model.goals.features:
+            self._consumers.setdefault(each_feature, "goals")
 
         for each_component in model.components:
             each_component.accept(self, model)
 
+        self._at_least_one_service_or_feature()
+        self._everything_required_is_provided()
+        self._only_safe_constraints(model)
+
         if self._errors:
             raise InvalidModel(self._errors)
 
 
-    def _at_least_one_service_or_feature(self, model):
-        if len(model.services) == 0 and len(model.features) == 0:
-            self._report(NoServiceAndNoFeature())
-
-
     def _at_least_one_goal(self, model):
         if len(model.goals.services) == 0 \
            and len(model.goals.features) == 0:
-            self._report(NoGoal())
-
+            self._report(NoGoal(), "goals")
 
-    def visit_service(self, service, model):
-        self._exists_at_least_one_service_provider(model, service)
 
-
-    def _exists_at_least_one_service_provider(self, model, service):
-        for each_component in model.components:
-            for any_provided_service in each_component.provided_services:
-                if any_provided_service == service:
-                    return True
-        self._report(NoServiceProvider(service))
+    def _at_least_one_service_or_feature(self):
+        if not self._provided and not self._consumers:
+            self._report(NoServiceAndNoFeature(), "components")
 
 
-    def visit_feature(self, feature, model):
-        self._exists_at_least_one_feature_provider(model, feature)
+    def _everything_required_is_provided(self):
+        missing = [each for each in self._consumers \
+                   if not each in self._provided]
+        for each in sorted(missing, key=lambda x: x.name):
+            if isinstance(each, Service):
+                self._report(NoServiceProvider(each), self._consumers[each])
+            else:
+                self._report(NoFeatureProvider(each), self._consumers[each])
 
 
-    def _exists_at_least_one_feature_provider(self, model, feature):
-        for each_component in model.components:
-            for any_provided_feature in each_component.provided_features:
-                if any_provided_feature == feature:
-                    return True
-        self._report(NoFeatureProvider(feature))
+    def _only_safe_constraints(self, model):
+        for index, each_constraint in enumerate(model.constraints, 1):
+            for each_identifier in unsafe_identifiers(each_constraint):
+                self._report(UnsafeConstraint(each_constraint, each_identifier),
+                             "constraints/#%d" % index)
 
 
     def visit_component(self, component, model):
-        self._required_features_are_defined(model, component)
-        self._provided_features_are_defined(model, component)
-        self._required_services_are_defined(model, component)
-        self._provided_services_are_defined(model, component)
-        for each_variable in component.variables:
-            each_variable.accept(self, model, component)
+        self._index(component)
+        self._at_least_one_instance(component)
+        self._no_empty_domain(component)
         if component.implementation:
             component.implementation.accept(self, model, component)
 
 
-    def _required_features_are_defined(self, model, component):
-        for any_feature in component.required_features:
-            if not any_feature in model:
-                self._report(UnknownRequiredFeature(model,
-                                                    component,
-                                                    any_feature))
-
-
-    def _provided_features_are_defined(self, model, component):
-        for any_feature in component.provided_features:
-            if any_feature not in model:
-                self._report(UnknownProvidedFeature(model,
-                                                    component,
-                                                    any_feature))
+    def _index(self, component):
+        path = "components/%s/" % component.name
+        self._provided.update(component.provided_services)
+        self._provided.update(component.provided_features)
+        for each_service in component.required_services:
+            self._consumers.setdefault(each_service, path + "requires_services")
+        for each_feature in component.required_features:
+            self._consumers.setdefault(each_feature, path + "requires_features")
 
 
-    def _required_services_are_defined(self, model, component):
-        for any_service in component.required_services:
-            if any_service not in model:
-                self._report(UnknownRequiredService(model,
-                                                    component,
-                                                    any_service))
+    def _at_least_one_instance(self, component):
+        if component.max_instances < 1:
+            self._report(InvalidInstanceBound(component),
+                         "components/%s/max_instances" % component.name)
 
 
-    def _provided_services_are_defined(self, model, component):
-        for any_service in component.provided_services:
-            if any_service not in model:
-                self._report(UnknownProvidedService(model,
-                                                    component,
-                                                    any_service))
-
-
-    def visit_variable(self, variable, model, component):
-        if len(variable.domain) == 0 and variable.value_type != "Integer":
-            self._report(EmptyVariableDomain(component, variable))
+    def _no_empty_domain(self, component):
+        for each_variable in component.variables:
+            if len(each_variable.domain) == 0 \
+               and each_variable.value_type != "Integer":
+                self._report(EmptyVariableDomain(component, each_variable),
+                             "components/%s/variables/%s" % (component.name,
+                                                             each_variable.name))
 
 
     def visit_dockerfile(self, dockerfile, model, component):
@@ -220,14 +308,19 @@ class Checker(object):
         if not isfile(path):
             self._report(DockerFileNotFound(component,
                                             path,
-                                            self._workspace))
+                                            self._workspace),
+                         "components/%s/implementation/docker/file" % component.name)
 
 
     def visit_dockerimage(self, dockerimage, model, component):
         pass
 
 
-    def _report(self, new_error):
+    def _report(self, new_error, path):
+        entry = path
+        while entry and not entry in self._locations:
+            entry = entry.rpartition("/")[0]
+        new_error.locate(path, self._locations.get(entry))
         self._errors.append(new_error)
 
 
@@ -10,19 +10,41 @@
 
 
 
+from camp.entities.decomposition import Decomposition
 from camp.entities.model import Configuration, Instance
+from camp.entities.validation import InvalidModel, UnsafeConstraint, \
+    unsafe_identifiers
 from camp.util import redirect_stderr_to
 
 from ozepy import load_all_classes, DefineObject, ObjectVar, \
     get_all_meta_facts, get_all_config_facts, cast_all_objects, \
     generate_config_constraints, generate_meta_constraints, start_over, \
-    ObjectConst
+    ObjectConst, Not, Implies, Or, And
+
+from collections import deque
+
+from itertools import chain, combinations, product
+
+from logging import debug
+
+from multiprocessing import Pool, Queue, active_children
+
+from os import getpid
 
 from pkgutil import get_data
 
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+from random import Random
+
+from time import time
+
 from yaml import load as load_yaml
 
-from z3 import Optimize, sat
+from z3 import Bool, If, IntVal, Optimize, Solver, Sum, Xor, sat
 
 
 
@@ -30,13 +52,20 @@ class Z3Problem(object):
 
 
     @staticmethod
-    def from_model(model):
+    def from_model(model, optimize=True, standalone=True):
+        """
+        Build the problem associated with the given model. Only the
+        coverage needs an optimizing solver: The enumeration of all
+        solutions only needs an incremental solver, which is much
+        faster. Problems that are not standalone solve one part of a
+        decomposed model, and accept the empty configuration.
+        """
         start_over()
         context = Context()
         context.load_metamodel()
         context.load_model(model)
 
-        solver = Optimize()
+        solver = Optimize() if optimize else Solver()
 
         generate_meta_constraints()
         generate_config_constraints()
@@ -47,9 +76,16 @@ class Z3Problem(object):
         context.declare(INTEGRITY_VARIABLES)
         context.declare_helper_functions()
 
+        for each_constraint in context.symmetry_constraints():
+            solver.add(each_constraint)
+
         for each_constraint in INTEGRITY_CONSTRAINTS:
             solver.add(context.evaluate(each_constraint))
 
+        if standalone:
+            for each_constraint in GLOBAL_CONSTRAINTS:
+                solver.add(context.evaluate(each_constraint))
+
         for each_running_service in model.goals.services:
             constraint = RUNNING_SERVICE.format(each_running_service.name)
             solver.add(context.evaluate(constraint))
@@ -58,45 +94,466 @@ class Z3Problem(object):
             solver.add(context.evaluate(each_constraint))
 
         for each_constraint in context.value_constraints:
-            solver.add(context.evaluate(each_constraint))
+            solver.add(each_constraint)
 
         #print solver.sexpr()
         return Z3Problem(model, context, solver)
 
 
+    @staticmethod
+    def all_solutions_in_parallel(model, jobs):
+        """
+        Enumerate all configurations using several worker processes,
+        one partition per component that provides the first running
+        service. As exactly one instance runs this service, partitions
+        never overlap. Workers stream configurations back as soon as
+        they find them: those of the first partition still running
+        pass through, and the others wait for their turn, so that the
+        numbering of configurations is the same from one run to the
+        other. Raise RuntimeError if a worker fails or dies.
+        """
+        partitions = Z3Problem._partitions_of(model)
+        if jobs < 2 or len(partitions) < 2:
+            problem = Z3Problem.from_model(model, optimize=False)
+            for each_configuration in problem.all_solutions():
+                yield each_configuration
+            return
+
+        queue = Queue(STREAMED_CONFIGURATIONS)
+        pool = Pool(min(jobs, len(partitions)), _share_queue, (queue,))
+        try:
+            result = pool.map_async(_stream_partition,
+                                    [(model, index, each) \
+                                     for index, each in enumerate(partitions)])
+            workers, waiting, done = {}, {}, set()
+            current = 0
+            while current < len(partitions):
+                try:
+                    kind, index, content = queue.get(timeout=WORKER_POLLING)
+                except Empty:
+                    Z3Problem._check_workers(result, workers, done, partitions)
+                    continue
+                if kind == _STARTED:
+                    workers[index] = content
+                elif kind == _FAILURE:
+                    raise RuntimeError(content)
+                elif kind == _CONFIGURATION and index == current:
+                    yield content
+                elif kind == _CONFIGURATION:
+                    waiting.setdefault(index, []).append(content)
+                else:
+                    done.add(index)
+                    while current in done:
+                        current += 1
+                        for each_configuration in waiting.pop(current, []):
+                            yield each_configuration
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+    @staticmethod
+    def _check_workers(result, workers, done, partitions):
+        if result.ready():
+            result.get()
+        alive = set(each.pid for each in active_children())
+        for index, pid in workers.items():
+            if not index in done and not pid in alive:
+                raise RuntimeError("Partition '%s': The worker process died"
+                                   % partitions[index])
+
+
+    @staticmethod
+    def all_solutions_by_parts(model, jobs=1):
+        """
+        Enumerate all configurations, solving separately the parts of
+        the model that share no service and no feature (see
+        Decomposition). The configurations of the parts are combined
+        lazily, so the cost is the sum of the parts, not their product.
+        """
+        parts = Decomposition().apply(model)
+        if len(parts) < 2:
+            for each_configuration in Z3Problem.all_solutions_in_parallel(model, jobs):
+                yield each_configuration
+            return
+
+        main_part, optional_parts = parts[0], parts[1:]
+        if jobs > 1:
+            pool = Pool(min(jobs, len(optional_parts)))
+            try:
+                optional_solutions = pool.map(_solve_part, optional_parts)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            optional_solutions = [_solve_part(each) for each in optional_parts]
+
+        for each_configuration in Z3Problem.all_solutions_in_parallel(main_part, jobs):
+            for each_combination in product(*optional_solutions):
+                instances = list(each_configuration.instances)
+                for each_part in each_combination:
+                    instances.extend(each_part.instances)
+                yield Configuration(model, instances)
+
+
+    @staticmethod
+    def _partitions_of(model):
+        if not model.goals.services:
+            return []
+        running_service = model.goals.services[0]
+        return sorted(each.name for each in model.components \
+                      if running_service in each.provided_services)
+
+
     def __init__(self, model, context, solver):
         self._model = model
         self._context = context
         self._solver = solver
+        self._statistics = BlockingStatistics()
+        self._known_solutions = []
+
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+
+    def restrict_to(self, component_name):
+        constraint = PROVIDER_IN_USE.format(component_name)
+        self._solver.add(self._context.evaluate(constraint))
+
+
+    @redirect_stderr_to("z3_errors.log")
+    def replay(self, configuration):
+        """
+        Check whether the given configuration, generated earlier, is
+        still valid. If so, it will not be generated again.
+        """
+        try:
+            assignment = self._as_assignment(configuration)
+        except (KeyError, ValueError):
+            return False
+
+        self._solver.push()
+        self._solver.add(assignment)
+        valid = self.has_solution()
+        if valid:
+            self._known_solutions.append(cast_all_objects(self._solver.model()))
+        self._solver.pop()
+        return valid
+
+
+    def _as_assignment(self, configuration):
+        names = self._context.instances
+        if any(not each.name in names for each in configuration.instances):
+            raise KeyError("Configuration has unknown instances")
+
+        clauses = []
+        for each_name in names:
+            if not each_name in configuration:
+                clauses.append(Not(self._context.exists(each_name)))
+                continue
+
+            clauses.append(self._context.exists(each_name))
+            instance = configuration.resolve(each_name)
+            z3_instance = self._context.find(each_name)
+            if instance.feature_provider:
+                provider = self._context.find(instance.feature_provider.name)
+                clauses.append(z3_instance.use_feature == provider)
+            else:
+                clauses.append(z3_instance.use_feature.undefined())
+
+            for each_service in instance.definition.required_services:
+                partner = self._context.find(
+                    self._context.qualified_name(each_name, each_service.name))
+                endpoints = [self._context.find(each.name) \
+                             for each in instance.service_providers \
+                             if each_service in each.definition.provided_services]
+                clauses.append(Or([partner.endpoint == each for each in endpoints]))
+
+            variables = set(each.name for each in instance.definition.variables)
+            if variables != set(variable.name for variable, _ in instance.configuration):
+                raise KeyError("Configuration of '%s' is incomplete" % each_name)
+            for variable, value in instance.configuration:
+                z3_value = self._context.find("%s_%s" % (each_name, variable.name))
+                clauses.append(z3_value.value == variable.index_of(value))
+
+        return And(clauses)
 
 
     @redirect_stderr_to("z3_errors.log")
     def all_solutions(self):
         self._solver.push()
+        for each_solution in self._known_solutions:
+            self._solver.add(self._as_constraint(each_solution))
         while self.has_solution():
             yield self._solve()
 
 
+    @redirect_stderr_to("z3_errors.log")
+    def count(self, limit=None):
+        """
+        Count the valid configurations, without building them. Stop
+        counting once 'limit' configurations have been found, if given.
+        """
+        count = 0
+        self._solver.push()
+        for each_solution in self._known_solutions:
+            self._solver.add(self._as_constraint(each_solution))
+        while (limit is None or count < limit) and self.has_solution():
+            z3_solution = cast_all_objects(self._solver.model())
+            self._solver.add(self._as_constraint(z3_solution))
+            count += 1
+        self._solver.pop()
+        return count
+
+
     @redirect_stderr_to("z3_errors.log")
     def coverage(self):
+        if not isinstance(self._solver, Optimize):
+            raise AssertionError("Coverage requires an optimizing solver!")
         self._solver.push()
+        if self._known_solutions:
+            for each_solution in self._known_solutions:
+                self._context.mark_as_covered(each_solution)
+                self._solver.add(self._as_constraint(each_solution))
+            for each_fact in self._context.coverage_facts():
+                self._solver.add(each_fact)
+            self._solver.push()
+            self._solver.add(self._context.coverage_constraint())
+            self._solver.maximize(self._context.coverage_gain())
         while self.has_solution():
             yield self._cover()
 
 
+    @redirect_stderr_to("z3_errors.log")
+    def greedy_coverage(self, strength=1):
+        """
+        Cover every combination of 'strength' components or variable
+        values (e.g., every pair when strength is 2), without any
+        optimization. Each configuration includes the first uncovered
+        target, and as many other uncovered targets as possible,
+        provided the solver finds a valid configuration for them.
+        Targets are generated lazily, so only those that the first
+        configuration leaves uncovered are ever kept. A strength above
+        the number of components and variables is capped to it.
+        """
+        known = [self._context.targets_in(each) for each in self._known_solutions]
+        targets = (each for each in self._coverage_targets(strength) \
+                   if not any(self._includes(atoms, each) for atoms in known))
+        single_instances = self._single_instance_variables()
+        uncovered = deque()
+        while True:
+            if uncovered:
+                first = uncovered.popleft()
+            else:
+                first = next(targets, None)
+                if first is None:
+                    return
+            z3_solution, left = self._cover_greedily(first,
+                                                     chain(uncovered, targets),
+                                                     single_instances)
+            if z3_solution is None:
+                continue
+            uncovered = left
+            yield self._extract_from(z3_solution)
+
+
+    def _coverage_targets(self, strength):
+        atoms = self._coverage_atoms()
+        strength = min(strength, len(set(factor for factor, _ in atoms)))
+        for each_combination in combinations(atoms, strength):
+            factors = set(factor for factor, _ in each_combination)
+            if len(factors) == strength:
+                yield tuple(atom for _, atom in each_combination)
+
+
+    def _single_instance_variables(self):
+        return set(Context.qualified_name(each_component.name, each_variable.name) \
+                   for each_component in self._model.components \
+                   if each_component.max_instances == 1 \
+                   for each_variable in each_component.variables)
+
+
+    def _coverage_atoms(self):
+        atoms = []
+        for each_component in self._model.components:
+            atoms.append((each_component.name,
+                          Context.component_target(each_component.name)))
+            for each_variable in each_component.variables:
+                variable_name = Context.qualified_name(each_component.name,
+                                                       each_variable.name)
+                for each_value in Context.domain_of(each_variable):
+                    atoms.append((variable_name,
+                                  Context.value_target(variable_name, each_value)))
+        return atoms
+
+
+    def _cover_greedily(self, first, candidates, single_instances):
+        """
+        Find a configuration that includes the first target, and as
+        many candidate targets as possible. Return it along with the
+        candidates it leaves uncovered, or None if the first target
+        cannot be covered, without consuming any candidate.
+        Candidates that need another value for a variable already
+        pinned, in a component that has a single instance, are left
+        out without calling the solver.
+        """
+        self._solver.push()
+        self._solver.add(self._context.target_constraint(first))
+        if not self.has_solution():
+            self._solver.pop()
+            return None, None
+
+        z3_solution = cast_all_objects(self._solver.model())
+        included = self._context.targets_in(z3_solution)
+        pinned = self._pin(first, {}, single_instances)
+        uncovered = deque()
+        covered_so_far = []
+        pushes = 1
+        for each_target in candidates:
+            if self._includes(included, each_target):
+                covered_so_far.append(each_target)
+                continue
+            if self._conflicts(each_target, pinned):
+                uncovered.append(each_target)
+                continue
+            self._solver.push()
+            self._solver.add(self._context.target_constraint(each_target))
+            if self.has_solution():
+                z3_solution = cast_all_objects(self._solver.model())
+                included = self._context.targets_in(z3_solution)
+                pinned = self._pin(each_target, pinned, single_instances)
+                pushes += 1
+            else:
+                self._solver.pop()
+                uncovered.append(each_target)
+
+        self._solver.pop(pushes)
+        uncovered.extend(each for each in covered_so_far \
+                         if not self._includes(included, each))
+        return z3_solution, uncovered
+
+
+    @staticmethod
+    def _includes(atoms, target):
+        return all(each in atoms for each in target)
+
+
+    @staticmethod
+    def _pin(target, pinned, single_instances):
+        pinned = dict(pinned)
+        for each_atom in target:
+            if each_atom[0] == Context.VALUE_TARGET \
+               and each_atom[1] in single_instances:
+                pinned[each_atom[1]] = each_atom[2]
+        return pinned
+
+
+    @staticmethod
+    def _conflicts(target, pinned):
+        return any(each_atom[0] == Context.VALUE_TARGET \
+                   and pinned.get(each_atom[1], each_atom[2]) != each_atom[2] \
+                   for each_atom in target)
+
+
+    @redirect_stderr_to("z3_errors.log")
+    def sample(self, count, seed=None):
+        """
+        Yield up to 'count' distinct configurations, picked nearly
+        uniformly at random without enumerating the others. Random
+        XOR constraints over the decision variables split the
+        configurations into cells of similar sizes. Each configuration
+        is drawn uniformly from a random cell small enough to be
+        enumerated, using as many XOR constraints as needed. The same
+        seed yields the same sample.
+        """
+        generator = Random(seed)
+        bits = self._context.decision_bits()
+        hashes = 0
+        self._solver.push()
+        try:
+            for each_solution in self._known_solutions:
+                self._solver.add(self._as_constraint(each_solution))
+            sampled = 0
+            while sampled < count and self.has_solution():
+                cell, hashes = self._random_cell(generator, bits, hashes)
+                if not cell:
+                    continue
+                z3_solution = generator.choice(cell)
+                self._solver.add(self._as_constraint(z3_solution))
+                sampled += 1
+                yield self._extract_from(z3_solution)
+
+        finally:
+            self._solver.pop()
+
+    SAMPLING_CELL = 16
+    SAMPLING_RETRIES = 3
+
+
+    def _random_cell(self, generator, bits, hashes):
+        """
+        Enumerate the configurations that satisfy 'hashes' random XOR
+        constraints, adding constraints while there are more than
+        SAMPLING_CELL of them, and removing one after a few empty
+        cells. Return the cell (possibly empty) and the number of XOR
+        constraints to start from next time.
+        """
+        empty_cells = 0
+        while True:
+            self._solver.push()
+            for _ in range(hashes):
+                self._solver.add(self._random_xor(generator, bits))
+            cell = self._enumerate(self.SAMPLING_CELL + 1)
+            self._solver.pop()
+            if len(cell) > self.SAMPLING_CELL and hashes < len(bits):
+                hashes += 1
+            elif cell or hashes == 0:
+                return cell[:self.SAMPLING_CELL], hashes
+            else:
+                empty_cells += 1
+                if empty_cells >= self.SAMPLING_RETRIES:
+                    hashes -= 1
+                    empty_cells = 0
+
+
+    @staticmethod
+    def _random_xor(generator, bits):
+        chosen = [each for each in bits if generator.random() < 0.5] \
+                 or [generator.choice(bits)]
+        parity = chosen[0]
+        for each_bit in chosen[1:]:
+            parity = Xor(parity, each_bit)
+        return parity if generator.random() < 0.5 else Not(parity)
+
+
+    def _enumerate(self, limit):
+        solutions = []
+        self._solver.push()
+        while len(solutions) < limit and self.has_solution():
+            z3_solution = cast_all_objects(self._solver.model())
+            solutions.append(z3_solution)
+            self._solver.add(self._as_constraint(z3_solution))
+        self._solver.pop()
+        return solutions
+
+
     def has_solution(self):
         return self._solver.check() == sat
 
 
     def _cover(self):
         z3_solution = cast_all_objects(self._solver.model())
-        #import pprint; pprint.pprint(z3_solution)
 
         self._context.mark_as_covered(z3_solution)
 
         self._solver.pop()
         self._solver.push()
-        self._solver.add(self._context.evaluate(self._as_constraint(z3_solution)))
+        self._solver.add(self._as_constraint(z3_solution))
+        for each_fact in self._context.coverage_facts():
+            self._solver.add(each_fact)
         self._solver.push()
         self._solver.add(self._context.coverage_constraint())
         self._solver.maximize(self._context.coverage_gain())
@@ -106,27 +563,42 @@ class Z3Problem(object):
     def _solve(self):
         z3_solution = cast_all_objects(self._solver.model())
 
-        self._solver.add(self._context.evaluate(self._as_constraint(z3_solution)))
+        self._solver.add(self._as_constraint(z3_solution))
         return self._extract_from(z3_solution)
 
 
-    @staticmethod
-    def _as_constraint(z3_solution):
+    def _as_constraint(self, z3_solution):
+        """
+        Build the clause that excludes the given solution. It only
+        spans the decision variables, that is, which instances exist,
+        their feature provider, the endpoints of their partners and
+        the values of their variables.
+        """
+        start = time()
         clauses = []
-        for key, item in z3_solution.items():
-            if "use_feature" in item:
-                if item["use_feature"] is not None:
-                    clauses.append("%s.use_feature != %s" % \
-                                   (key, item["use_feature"]))
-                if item["partners"]:
-                    for each_partner in item["partners"]:
-                        clauses.append("%s.endpoint != %s" %
-                                   (each_partner, z3_solution[each_partner]["endpoint"]))
-                if item["configuration"]:
-                    for each_value in item["configuration"]:
-                        clauses.append("Not(%s.value == %s)" %\
-                                       (each_value, z3_solution[each_value]["value"]))
-        return "Or(" + ",".join(clauses) + ")"
+        for each_instance in self._context.instances:
+            if not each_instance in z3_solution:
+                clauses.append(self._context.exists(each_instance))
+                continue
+
+            clauses.append(Not(self._context.exists(each_instance)))
+            item = z3_solution[each_instance]
+            instance = self._context.find(each_instance)
+            if item["use_feature"] is not None:
+                provider = self._context.find(item["use_feature"])
+                clauses.append(instance.use_feature != provider)
+            if item["partners"]:
+                for each_partner in item["partners"]:
+                    partner = self._context.find(each_partner)
+                    endpoint = self._context.find(z3_solution[each_partner]["endpoint"])
+                    clauses.append(partner.endpoint != endpoint)
+            if item["configuration"]:
+                for each_value in item["configuration"]:
+                    value = self._context.find(each_value)
+                    clauses.append(Not(value.value == z3_solution[each_value]["value"]))
+
+        self._statistics.record(len(clauses), time() - start)
+        return Or(clauses)
 
 
 
@@ -169,17 +641,111 @@ class Z3Problem(object):
 
 
 
+def _solve_part(model):
+    problem = Z3Problem.from_model(model, optimize=False, standalone=False)
+    return list(problem.all_solutions())
+
+
+
+_STARTED, _CONFIGURATION, _FAILURE, _DONE = range(4)
+
+_QUEUE = None
+
+
+def _share_queue(queue):
+    global _QUEUE
+    _QUEUE = queue
+
+
+def _stream_partition(task):
+    model, index, component_name = task
+    queue = _QUEUE
+    queue.put((_STARTED, index, getpid()))
+    try:
+        problem = Z3Problem.from_model(model, optimize=False)
+        problem.restrict_to(component_name)
+        for each_configuration in problem.all_solutions():
+            queue.put((_CONFIGURATION, index, each_configuration))
+
+    except Exception as error:
+        queue.put((_FAILURE, index, "Partition '%s': %s" % (component_name, error)))
+
+    finally:
+        queue.put((_DONE, index, component_name))
+
+
+
+class BlockingStatistics(object):
+    """
+    Track the size and the time spent to build the clauses that
+    exclude the solutions already found.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._last_size = 0
+        self._last_duration = 0.
+        self._total_size = 0
+        self._total_duration = 0.
+
+
+    def record(self, size, duration):
+        self._count += 1
+        self._last_size = size
+        self._last_duration = duration
+        self._total_size += size
+        self._total_duration += duration
+        debug("Blocking clause #%d: %d literals, built in %.4f s.",
+              self._count, size, duration)
+
+
+    @property
+    def count(self):
+        return self._count
+
+
+    @property
+    def last_size(self):
+        return self._last_size
+
+
+    @property
+    def last_duration(self):
+        return self._last_duration
+
+
+    @property
+    def average_size(self):
+        if self._count == 0:
+            return 0.
+        return float(self._total_size) / self._count
+
+
+    @property
+    def total_duration(self):
+        return self._total_duration
+
+
+
 class Context(object):
 
     def __init__(self):
         self._definitions = {}
-        self._definitions[self.COVERED_VALUES] = []
-        self._definitions[self.COVERED_COMPONENTS] = []
         exec("from ozepy import Not, Implies, Or, And", self._definitions)
+        self._definitions["__builtins__"] = dict(SAFE_BUILTINS)
         self._value_constraints = []
-
-    COVERED_VALUES = "covered_values"
-    COVERED_COMPONENTS = "covered_components"
+        self._components = []
+        self._variables = []
+        self._instances = []
+        self._model = None
+        self._replicas = []
+        self._instances_of = {}
+        self._component_of = {}
+        self._values = {}
+        self._covered = set()
+        self._newly_covered = []
+        self._fresh = None
+        self._open_variables = {}
 
 
     @property
@@ -187,10 +753,37 @@ class Context(object):
         return self._value_constraints
 
 
+    @property
+    def instances(self):
+        return [each for each in self._instances]
+
+
+    def exists(self, instance_name):
+        ci = self.find("ci")
+        return self.find("CInstance").exists(ci, ci == self.find(instance_name))
+
+
     def evaluate(self, constraint):
-        #print constraint.strip()
-        return eval(constraint.strip(), self._definitions)
+        return eval(self._compile(constraint), self._definitions)
+
 
+    @staticmethod
+    def _compile(constraint):
+        """
+        Constraints are Python expressions, which we parse only once
+        and whose bytecode is shared by all contexts. Raise
+        InvalidModel if they could reach Python internals.
+        """
+        code = COMPILED_CONSTRAINTS.get(constraint)
+        if code is None:
+            unsafe = unsafe_identifiers(constraint)
+            if unsafe:
+                raise InvalidModel([UnsafeConstraint(constraint, unsafe[0])])
+            if len(COMPILED_CONSTRAINTS) >= MAXIMUM_COMPILED_CONSTRAINTS:
+                COMPILED_CONSTRAINTS.clear()
+            code = compile(constraint.strip(), "<constraint>", "eval")
+            COMPILED_CONSTRAINTS[constraint] = code
+        return code
 
 
     def declare(self, declarations):
@@ -209,6 +802,11 @@ class Context(object):
 
 
     def load_metamodel(self):
+        """
+        Load the metaclasses anew for every problem: start_over()
+        resets the global state of ozepy, which these classes and
+        their meta facts belong to, so they cannot be shared.
+        """
         data = get_data('camp', 'data/metamodel.yml')
         metamodel = load_yaml(data)
         metaclasses = load_all_classes(metamodel)
@@ -217,6 +815,7 @@ class Context(object):
 
 
     def load_model(self, model):
+        self._model = model
         self._define_all_services(model)
         self._define_all_features(model)
         self._define_all_components(model)
@@ -241,6 +840,7 @@ class Context(object):
             z3_component = DefineObject(each_component.name,
                                         self.find("Component"))
             self.define(each_component.name, z3_component)
+            self._components.append(each_component.name)
 
             self._define_all_variables(each_component)
 
@@ -265,7 +865,7 @@ class Context(object):
                         for each in each_component.variables]
             z3_component.force_value("settings", settings)
 
-            self._instantiate(each_component, 1)
+            self._instantiate(each_component, each_component.max_instances)
 
 
     def _define_all_variables(self, component):
@@ -276,6 +876,7 @@ class Context(object):
             z3_variable = DefineObject(qualified_name,
                                        self.find("Variable"))
             self.define(qualified_name, z3_variable)
+            self._variables.append((qualified_name, each_variable))
 
 
     @staticmethod
@@ -284,12 +885,16 @@ class Context(object):
 
 
     def _instantiate(self, component, count=1):
+        replicas = []
         for index in range(count):
             instance_name = component.name.lower() + "_%d" % index
+            replicas.append(instance_name)
             z3_instance = DefineObject(instance_name,
                                        self.find("CInstance"),
                                        suspended=True)
             self.define(instance_name, z3_instance)
+            self._instances.append(instance_name)
+            self._component_of[instance_name] = component
             z3_instance.force_value("definition", self.find(component.name))
 
             # define partners
@@ -311,6 +916,7 @@ class Context(object):
 
 
             values = []
+            self._values[instance_name] = []
             for each_variable in component.variables:
                 qualified_variable_name = "%s_%s" % (component.name, each_variable.name)
                 value_name = "%s_%s" % (instance_name, each_variable.name)
@@ -318,23 +924,194 @@ class Context(object):
                                         self.find("Value"),
                                         suspended=True)
                 self.define(value_name, z3_value)
+                self._values[instance_name].append(value_name)
 
-                if each_variable.domain:
+                if len(each_variable.domain) == 1:
+                    self._value_constraints.append(
+                        z3_value.value == each_variable.index_of(each_variable.domain[0]))
+                elif each_variable.domain:
                     if each_variable.value_type != "Integer":
                         self._value_constraints.append(
-                            "And([%s.value >= 0, %s.value < %d])" % (value_name,
-                                                                     value_name,
-                                                                     len(each_variable.domain)))
+                            And([z3_value.value >= 0,
+                                 z3_value.value < len(each_variable.domain)]))
                     else:
-                        clauses = ",".join("%s.value == %d" %
-                                           (value_name, v) for v in each_variable.domain)
-                        self._value_constraints.append("Or([" + clauses + "])")
+                        self._value_constraints.append(
+                            Or([z3_value.value == v for v in each_variable.domain]))
 
                 z3_value.force_value("variable", self.find(qualified_variable_name))
 
                 values.append(z3_value)
             z3_instance.force_value("configuration", values)
 
+        self._instances_of[component.name] = replicas
+        if len(replicas) > 1:
+            self._replicas.append((component, replicas))
+
+
+    def symmetry_constraints(self):
+        """
+        Instances of the same component are interchangeable. We thus
+        only accept solutions where they exist in order, and where
+        their keys are sorted lexicographically. The key of an
+        instance gathers the values of its variables, and the
+        positions of its feature provider and of the endpoints of its
+        partners among their candidates.
+        """
+        constraints = []
+        for component, replicas in self._replicas:
+            keys = [self._key_of(component, each) for each in replicas]
+            for index in range(1, len(replicas)):
+                current = replicas[index]
+                constraints.append(Implies(self.exists(current),
+                                           self.exists(replicas[index - 1])))
+                ordering = self._lexicographic_order(keys[index - 1], keys[index])
+                if ordering is not None:
+                    constraints.append(Implies(self.exists(current), ordering))
+        return constraints
+
+
+    def _key_of(self, component, instance_name):
+        """
+        Providers that could, even indirectly, use this component are
+        left out of the key: renaming its instances would then reorder
+        their keys too, and no ordering might remain.
+        """
+        key = [self.find(each).value for each in self._values[instance_name]]
+        if component.required_features:
+            hosts = [each for each in self._model.providers_of(component.required_features[0]) \
+                     if all(feature in each.provided_features \
+                            for feature in component.required_features)]
+            if self._independent_of(component, hosts):
+                instance = self.find(instance_name)
+                key.append(self._position_among(instance.use_feature, hosts))
+        for each_service in component.required_services:
+            providers = self._model.providers_of(each_service)
+            if self._independent_of(component, providers):
+                partner = self.find(self.qualified_name(instance_name, each_service.name))
+                key.append(self._position_among(partner.endpoint, providers))
+        return key
+
+
+    def _independent_of(self, component, providers):
+        return all(each.name != component.name \
+                   and not self._depends_on(each, component.name) \
+                   for each in providers)
+
+
+    def _depends_on(self, component, other_name):
+        pending = [component]
+        visited = set([component.name])
+        while pending:
+            current = pending.pop()
+            for each_required in current.required_services + current.required_features:
+                for each_provider in self._model.providers_of(each_required):
+                    if each_provider.name == other_name:
+                        return True
+                    if not each_provider.name in visited:
+                        visited.add(each_provider.name)
+                        pending.append(each_provider)
+        return False
+
+
+    def _position_among(self, reference, components):
+        candidates = self._instances_among(components)
+        position = IntVal(-1)
+        for index, each_name in reversed(list(enumerate(candidates))):
+            position = If(reference == self.find(each_name), IntVal(index), position)
+        return position
+
+
+    def _instances_among(self, components):
+        return [each_name \
+                for each in components \
+                for each_name in self._instances_of[each.name]]
+
+
+    def decision_bits(self):
+        """
+        Boolean expressions whose values tell solutions apart: which
+        instances exist, which value each variable holds (one bit per
+        value of its domain), and which instances each instance uses
+        as feature provider and as endpoints of its partners.
+        Variables without domain are left out.
+        """
+        bits = []
+        for each_instance in self._instances:
+            bits.append(self.exists(each_instance))
+            component = self._component_of[each_instance]
+            for value_name, variable in zip(self._values[each_instance],
+                                            component.variables):
+                value = self.find(value_name).value
+                bits.extend(value == each for each in self.domain_of(variable))
+            if component.required_features:
+                instance = self.find(each_instance)
+                hosts = self._model.providers_of(component.required_features[0])
+                bits.extend(instance.use_feature == self.find(each) \
+                            for each in self._instances_among(hosts))
+            for each_service in component.required_services:
+                partner = self.find(self.qualified_name(each_instance, each_service.name))
+                providers = self._model.providers_of(each_service)
+                bits.extend(partner.endpoint == self.find(each) \
+                            for each in self._instances_among(providers))
+        return bits
+
+
+    @staticmethod
+    def _lexicographic_order(left, right):
+        pairs = list(zip(left, right))
+        if not pairs:
+            return None
+
+        first, second = pairs[-1]
+        ordering = first <= second
+        for first, second in reversed(pairs[:-1]):
+            ordering = Or([first < second, And([first == second, ordering])])
+        return ordering
+
+
+    COMPONENT_TARGET = "component"
+    VALUE_TARGET = "value"
+
+
+    @staticmethod
+    def component_target(component_name):
+        return (Context.COMPONENT_TARGET, component_name)
+
+
+    @staticmethod
+    def value_target(variable_name, value):
+        return (Context.VALUE_TARGET, variable_name, value)
+
+
+    def target_constraint(self, target):
+        """
+        The constraint that holds when a configuration includes all
+        the atoms of the given target.
+        """
+        instance, ci, val = self.find("CInstance"), self.find("ci"), self.find("val")
+        clauses = []
+        for each_atom in target:
+            if each_atom[0] == self.COMPONENT_TARGET:
+                clauses.append(instance.exists(ci, ci.definition == self.find(each_atom[1])))
+            else:
+                _, variable, value = each_atom
+                clauses.append(instance.exists(ci, ci.configuration.exists(
+                    val, And([val.variable == self.find(variable), val.value == value]))))
+        return And(clauses)
+
+
+    @staticmethod
+    def targets_in(z3_solution):
+        atoms = set()
+        for _, item in z3_solution.items():
+            if "definition" in item:
+                atoms.add(Context.component_target(item["definition"]))
+                if "configuration" in item and item["configuration"]:
+                    for each_value in item["configuration"]:
+                        value = z3_solution[each_value]
+                        atoms.add(Context.value_target(value["variable"], value["value"]))
+        return atoms
+
 
     def define(self, key, value):
         if key in self._definitions:
@@ -352,48 +1129,110 @@ class Context(object):
 
     @property
     def covered_components(self):
-        return self.find(self.COVERED_COMPONENTS)
+        return set(atom[1] for atom in self._covered \
+                   if atom[0] == self.COMPONENT_TARGET)
 
 
     @property
     def covered_values(self):
-        return self.find(self.COVERED_VALUES)
+        return set((atom[1], atom[2]) for atom in self._covered \
+                   if atom[0] == self.VALUE_TARGET)
 
 
     def mark_as_covered(self, z3_solution):
-        for key, item in z3_solution.items():
-            if "definition" in item:
-                definition = self.find(item["definition"])
-                if not definition in self.covered_components:
-                    self.covered_components.append(definition)
-                if "configuration" in item:
-                    for each_value in item["configuration"]:
-                        value = z3_solution[each_value]
-                        if not value in self.covered_values:
-                           self.covered_values.append((value["variable"], value["value"]))
+        for each_atom in self.targets_in(z3_solution):
+            if not each_atom in self._covered:
+                self._covered.add(each_atom)
+                self._newly_covered.append(each_atom)
+
+
+    def coverage_facts(self):
+        """
+        The constraints to add once and for all, to account for what
+        has been covered since the last call. Each component and each
+        variable value has a literal, which can only hold if a
+        configuration includes it, and which is disabled once it is
+        covered. Variables without domain have a single literal per
+        set of covered values instead.
+        """
+        facts = []
+        if self._fresh is None:
+            facts.extend(self._track_coverage_items())
+
+        open_variables = set()
+        for each_atom in self._newly_covered:
+            if each_atom in self._fresh:
+                facts.append(Not(self._fresh[each_atom]))
+            elif each_atom[0] == self.VALUE_TARGET \
+                 and each_atom[1] in self._open_variables:
+                open_variables.add(each_atom[1])
+        self._newly_covered = []
+
+        for each_variable in open_variables:
+            facts.append(Not(self._open_variables[each_variable]))
+            facts.append(self._track_open_variable(each_variable))
+        return facts
+
+
+    def _track_coverage_items(self):
+        self._fresh = {}
+        definitions = []
+        for each_component in self._components:
+            atom = self.component_target(each_component)
+            definitions.append(self._track(atom))
+        for variable_name, variable in self._variables:
+            domain = self.domain_of(variable)
+            if domain:
+                for each_value in domain:
+                    atom = self.value_target(variable_name, each_value)
+                    definitions.append(self._track(atom))
+            else:
+                definitions.append(self._track_open_variable(variable_name))
+
+        literals = list(self._fresh.values())
+        self._any_fresh = Or(literals)
+        self._fresh_count = self._count(literals)
+        return definitions
+
+
+    def _track(self, atom):
+        literal = Bool("fresh_%d" % len(self._fresh))
+        self._fresh[atom] = literal
+        return Implies(literal, self.target_constraint((atom,)))
+
+
+    def _track_open_variable(self, variable_name):
+        instance, ci, val = self.find("CInstance"), self.find("ci"), self.find("val")
+        literal = Bool("fresh_%s_%d" % (variable_name, len(self._covered)))
+        self._open_variables[variable_name] = literal
+        values = [val.value != value for variable, value in self.covered_values \
+                  if variable == variable_name]
+        return Implies(literal, instance.exists(ci, ci.configuration.exists(
+            val, And([val.variable == self.find(variable_name)] + values))))
+
+
+    @staticmethod
+    def _count(literals):
+        return Sum([IntVal(0)] + [If(each, 1, 0) for each in literals])
+
+
+    @staticmethod
+    def domain_of(variable):
+        """
+        The values that the solver may assign to the given variable,
+        or an empty list if there is no such domain.
+        """
+        if variable.value_type != "Integer":
+            return list(range(len(variable.domain)))
+        return variable.domain
+
 
     def coverage_constraint(self):
-        template = ("Or([CInstance.exists(ci, ci.configuration.exists(val, And([%s]))),"
-                    "CInstance.exists(ci, And([%s]))])")
-        values = ", ".join("Implies(val.variable == %s, val.value != %d)" % (variable, value) \
-                          for variable, value in self.covered_values)
-        components = ", ".join("ci.definition != %s" % each \
-                              for each in self.covered_components)
-        constraint = template % (values, components)
-        return self.evaluate(constraint)
+        return Or([self._any_fresh] + list(self._open_variables.values()))
 
 
     def coverage_gain(self):
-        constraint = "0"
-        if self.covered_values:
-            constraint = "CInstance.filter(ci, ci.configuration.exists(val, And([%s]))).count()"
-            values = ", ".join("Implies(val.variable != %s, val.value != %d)" % (variable, value) \
-                           for variable, value in self.covered_values)
-            constraint = constraint % values
-        constraint += " + CInstance.filter(ci, And([%s])).count()"
-        components = ", ".join("ci.definition != %s" % each for each in self.covered_components)
-        constraint = constraint % components
-        return self.evaluate(constraint)
+        return self._fresh_count + self._count(self._open_variables.values())
 
 
 
@@ -409,11 +1248,6 @@ INTEGRITY_VARIABLES = [
 
 
 INTEGRITY_CONSTRAINTS = [
-    # There must be at least one instance
-    """
-    CInstance.all_instances().count() > 0
-    """,
-
     # Cannot be deploy on itself
     """
     CInstance.forall(ci, Not(ci["use_feature"] == ci))
@@ -465,14 +1299,6 @@ INTEGRITY_CONSTRAINTS = [
     CInstance.forall(ci1,
        Implies(ci1.definition.provide_features.count() > 0,
                CInstance.exists(ci2, ci2.use_feature == ci1)))
-    """,
-
-    # Only one pending service
-    """
-    CInstance.filter(ci1,
-          And([ci1.definition.provide_services.count() > 0,
-               CInstance.forall(ci2, ci2.partners.forall(partner,
-                    partner.endpoint != ci1))])).count() == 1
     """
 
     # No pending instances
@@ -488,5 +1314,45 @@ INTEGRITY_CONSTRAINTS = [
 ]
 
 
+# Constraints over the configuration as a whole, which do not hold on
+# the parts of a decomposed model that provide no service.
+GLOBAL_CONSTRAINTS = [
+    # There must be at least one instance
+    """
+    CInstance.all_instances().count() > 0
+    """,
+
+    # Only one pending service
+    """
+    CInstance.filter(ci1,
+          And([ci1.definition.provide_services.count() > 0,
+               CInstance.forall(ci2, ci2.partners.forall(partner,
+                    partner.endpoint != ci1))])).count() == 1
+    """
+]
+
+
 RUNNING_SERVICE = """CInstance.filter(ci, ci["definition"].provide_services.exists
 ( sp, sp == {})).count() == 1"""
+
+
+PROVIDER_IN_USE = """CInstance.exists(ci, ci["definition"] == {})"""
+
+
+COMPILED_CONSTRAINTS = {}
+
+
+# The only builtins that constraints can use, as Python 2 parses
+# these constants as names.
+SAFE_BUILTINS = {"True": True, "False": False, "None": None}
+
+
+# The number of configurations that workers may find ahead of the
+# consumer, when enumerating in parallel.
+STREAMED_CONFIGURATIONS = 1000
+
+# How long, in seconds, to wait for workers before checking that they
+# are still alive.
+WORKER_POLLING = 1
+
+MAXIMUM_COMPILED_CONSTRAINTS = 1024
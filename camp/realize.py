@@ -31,7 +31,7 @@ class Builder(object):
 
 
     def build(self, configuration, input_directory=None, output_directory=None):
-        self._images = []
+        self._images = configuration.hosting_order
         if input_directory:
             self._input_directory = input_directory
         if output_directory:
@@ -115,7 +115,6 @@ class Builder(object):
             return join_paths(self._output_directory, resource)
 
     def _adjust_docker_file(self, instance):
-        self._record_dependency_of(instance)
         host = instance.feature_provider.definition.implementation
         kind = type(host)
         if kind == DockerImage:
@@ -180,15 +179,6 @@ class Builder(object):
         return "camp-%s" % instance.name
 
 
-    def _record_dependency_of(self, instance):
-        if instance.feature_provider in self._images:
-            index = self._images.index(instance.feature_provider)
-            self._images.insert(index+1, instance)
-        else:
-            self._images.append(instance.feature_provider)
-            self._images.append(instance)
-
-
 
     def _generate_build_script(self):
         build_commands = []
@@ -10,6 +10,7 @@
 
 
 
+from camp.cache import ModelCache
 from camp.codecs.yaml import YAML
 from camp.core import Camp
 from camp.commands import Command
@@ -21,6 +22,6 @@ from sys import argv
 
 
 def main():
-    camp = Camp(YAML(), Z3Problem, Builder())
+    camp = Camp(YAML(), Z3Problem, Builder(), model_cache=ModelCache())
     command = Command.extract_from(argv[1:])
     command.send_to(camp)
@@ -0,0 +1,392 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.codecs.json import JSON
+from camp.codecs.yaml import YAML, InvalidYAMLModel
+from camp.commands import Command
+from camp.entities.validation import Checker, InvalidModel, \
+    DockerFileNotFound
+
+from binascii import hexlify
+
+from hmac import compare_digest
+
+from itertools import islice
+
+from os import urandom
+
+from json import dumps, loads
+
+from socket import error as SocketError
+
+from threading import Event, Lock, Thread
+
+from z3 import main_ctx
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from StringIO import StringIO
+    from urllib import urlencode
+    from urllib2 import Request, urlopen
+    from urlparse import urlparse, parse_qsl
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from io import StringIO
+    from urllib.parse import urlencode, urlparse, parse_qsl
+    from urllib.request import Request, urlopen
+
+
+
+class UnsupportedOption(Exception):
+
+
+    def __init__(self, option):
+        self._option = option
+
+
+    @property
+    def option(self):
+        return self._option
+
+
+
+class RemoteHostRefused(Exception):
+
+
+    def __init__(self, host):
+        self._host = host
+
+
+    @property
+    def host(self):
+        return self._host
+
+
+
+class GenerationFailed(Exception):
+    """
+    Report an error that the server met while streaming
+    configurations.
+    """
+
+
+
+class GenerationServer(object):
+    """
+    Serve 'camp generate' over HTTP, so that Python, its imports and
+    the compiled constraints stay loaded from one request to the next.
+    The solver itself, metamodel included, is set up for each request.
+
+    POST /generate?<options> with a CAMP model (YAML) as body streams
+    back the configurations as JSON lines, as soon as they are found.
+    Only the options that select which configurations to generate are
+    accepted (see OPTIONS): the others would act on the server's own
+    files and processes.
+    Errors met while streaming come last, as a JSON line with a single
+    'error' entry. Requests are served one at a time, because the
+    solver relies on global state. POST /cancel stops the running
+    generation, interrupting the solver if need be.
+
+    Every request must carry the server's token in the TOKEN_HEADER
+    header. Requests sent by browsers (with an 'Origin' header) and
+    models that are not YAML are rejected, and the server only
+    listens to the loopback interface unless told otherwise.
+    """
+
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 8642
+
+    OPTIONS = ["all", "coverage", "strength", "limit", "sample", "seed"]
+
+    ERROR = "error"
+
+    TOKEN_HEADER = "X-CAMP-Token"
+
+    CONTENT_TYPES = ["application/x-yaml", "application/yaml", "text/yaml"]
+
+    def __init__(self, camp, host=None, port=None, token=None, remote=False):
+        host = host or self.DEFAULT_HOST
+        if not remote and not self.is_loopback(host):
+            raise RemoteHostRefused(host)
+        self._camp = camp
+        self._token = token or hexlify(urandom(16)).decode("ascii")
+        self._lock = Lock()
+        self._cancelled = Event()
+        self._running = Event()
+        self._http = _ThreadingHTTPServer((host,
+                                           self.DEFAULT_PORT if port is None else port),
+                                          _RequestHandler)
+        self._http.generation_server = self
+
+
+    @staticmethod
+    def is_loopback(host):
+        return host == "localhost" \
+            or host == "::1" \
+            or host.startswith("127.")
+
+
+    @property
+    def token(self):
+        return self._token
+
+
+    def accepts(self, token):
+        return token is not None \
+            and compare_digest(token.encode("utf-8"), self._token.encode("utf-8"))
+
+
+    @property
+    def address(self):
+        host, port = self._http.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+
+    def serve_forever(self):
+        self._http.serve_forever()
+
+
+    def start(self):
+        thread = Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+
+    def shutdown(self):
+        self.cancel()
+        self._http.shutdown()
+        self._http.server_close()
+
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._running.is_set():
+            main_ctx().interrupt()
+
+
+    def prepare(self, model_text, options):
+        """
+        Parse the given model and options. Raise UnsupportedOption if
+        an option is not among OPTIONS, InvalidYAMLModel or
+        InvalidModel if the model is invalid, and SystemExit if the
+        options are.
+        """
+        for key, _ in options:
+            if not key in self.OPTIONS:
+                raise UnsupportedOption(key)
+        arguments = Command.extract_from(["generate"] + self._command_line(options))
+        return arguments, self._load_model(model_text)
+
+
+    def generate(self, arguments, model, stream):
+        with self._lock:
+            self._cancelled.clear()
+            self._running.set()
+            configurations = None
+            try:
+                _, configurations = self._camp.configurations_for(arguments, model)
+                codec = JSON()
+                for each_configuration in islice(configurations, arguments.limit):
+                    if self._cancelled.is_set():
+                        break
+                    codec.save_configuration(each_configuration, stream)
+                    stream.flush()
+
+            except (IOError, SocketError):
+                pass
+
+            except Exception as error:
+                self._report(error, stream)
+
+            finally:
+                self._running.clear()
+                if configurations is not None:
+                    configurations.close()
+
+
+    def _report(self, error, stream):
+        try:
+            stream.write((dumps({self.ERROR: str(error)}) + "\n").encode("utf-8"))
+            stream.flush()
+
+        except (IOError, SocketError):
+            pass
+
+
+    @staticmethod
+    def _command_line(options):
+        command_line = []
+        for key, value in options:
+            command_line.append("--" + key)
+            if value:
+                command_line.append(value)
+        return command_line
+
+
+    @staticmethod
+    def _load_model(model_text):
+        codec = YAML()
+        model = codec.load_model_from(StringIO(model_text))
+        try:
+            model.accept(Checker(locations=codec.locations))
+
+        except InvalidModel as error:
+            # Docker files belong to the client's workspace
+            errors = [each for each in error.errors \
+                      if not isinstance(each, DockerFileNotFound)]
+            if errors:
+                raise InvalidModel(errors)
+
+        return model
+
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+
+    def do_POST(self):
+        server = self.server.generation_server
+        request = urlparse(self.path)
+        if self.headers.get("Origin") is not None:
+            self._reply(403, "Cross-origin requests are forbidden.")
+        elif not server.accepts(self.headers.get(GenerationServer.TOKEN_HEADER)):
+            self._reply(403, "Missing or invalid token.")
+        elif request.path == "/generate":
+            self._generate(server, parse_qsl(request.query, keep_blank_values=True))
+        elif request.path == "/cancel":
+            server.cancel()
+            self._reply(200, "Cancelled.")
+        else:
+            self._reply(404, "Unknown resource '%s'." % request.path)
+
+
+    def _generate(self, server, options):
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if not content_type in GenerationServer.CONTENT_TYPES:
+            self._reply(415, "Models must be sent as YAML ('%s')."
+                        % GenerationServer.CONTENT_TYPES[0])
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        model_text = self.rfile.read(length).decode("utf-8")
+        try:
+            arguments, model = server.prepare(model_text, options)
+
+        except UnsupportedOption as error:
+            self._reply(400, "Unsupported option '%s'." % error.option)
+            return
+
+        except InvalidYAMLModel as error:
+            self._reply(400, "\n".join(str(each) for each in error.warnings))
+            return
+
+        except InvalidModel as error:
+            self._reply(400, "\n".join(str(each) for each in error.errors))
+            return
+
+        except SystemExit:
+            self._reply(400, "Invalid options: %s" % urlencode(options))
+            return
+
+        except Exception as error:
+            self._reply(500, "Unexpected error: %s" % error)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        server.generate(arguments, model, self.wfile)
+
+
+    def _reply(self, status, message):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write((message + "\n").encode("utf-8"))
+
+
+    def log_message(self, pattern, *arguments):
+        pass
+
+
+
+class GenerationClient(object):
+    """
+    Ask a running 'camp serve' for the configurations of a model.
+    """
+
+    def __init__(self, address, token=None):
+        self._address = address.rstrip("/")
+        self._token = token
+
+
+    def configurations(self, model, model_text, arguments):
+        """
+        Yield the configurations that the server streams back. Raise
+        GenerationFailed if the server reports an error.
+        """
+        request = Request(self._address + "/generate?" +
+                          urlencode(self.options_of(arguments)),
+                          data=model_text.encode("utf-8"),
+                          headers=self._headers(GenerationServer.CONTENT_TYPES[0]))
+        response = urlopen(request)
+        codec = JSON()
+        try:
+            for each_line in response:
+                each_line = each_line.decode("utf-8")
+                if not each_line.strip():
+                    continue
+                record = loads(each_line)
+                if GenerationServer.ERROR in record:
+                    raise GenerationFailed(record[GenerationServer.ERROR])
+                yield codec.load_configuration_from(model, StringIO(each_line))
+
+        finally:
+            response.close()
+
+
+    def cancel(self):
+        urlopen(Request(self._address + "/cancel", data=b"",
+                        headers=self._headers())).close()
+
+
+    def _headers(self, content_type=None):
+        headers = {}
+        if self._token is not None:
+            headers[GenerationServer.TOKEN_HEADER] = self._token
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+        return headers
+
+
+    @staticmethod
+    def options_of(arguments):
+        options = []
+        if not arguments.only_coverage:
+            options.append(("all", ""))
+        else:
+            options.append(("coverage", arguments.coverage_engine))
+            options.append(("strength", str(arguments.strength)))
+        for key in ["limit", "sample", "seed"]:
+            value = getattr(arguments, key)
+            if value is not None:
+                options.append((key, str(value)))
+        return options
@@ -41,6 +41,17 @@ class UI(object):
         self._print("Loaded '{path}'.", path=path)
 
 
+    def model_pruned(self, removed_components, fixed_variables):
+        if removed_components:
+            self._print("Pruned {count} impossible component(s): {names}.",
+                        count=len(removed_components),
+                        names=", ".join(removed_components))
+        if fixed_variables:
+            self._print("Fixed {count} single-valued variable(s): {names}.",
+                        count=len(fixed_variables),
+                        names=", ".join(fixed_variables))
+
+
     def new_configuration(self, index, configuration, path):
         self._print("\n - Config. {index} in '{path}'.",
                     index=index,
@@ -48,10 +59,81 @@ class UI(object):
         self._summarize(configuration)
 
 
+    def configurations_cached(self, path):
+        self._print("Reusing configurations cached in '{path}' ...", path=path)
+
+
+    def configurations_requested(self, address):
+        self._print("Requesting configurations from '{address}' ...",
+                    address=address)
+
+
+    def server_started(self, address, token):
+        self._print("Serving 'camp generate' on '{address}' (Ctrl+C to stop) ...",
+                    address=address)
+        self._print("Clients must send the token '{token}' (see --token).",
+                    token=token)
+
+
+    def remote_host_refused(self, host):
+        self._print("\nError:")
+        self._print(" - '{host}' is not a loopback interface.", host=host)
+        self._print("   Use '--remote' to serve other machines anyway.")
+
+
+    def configuration_reused(self, index):
+        self._print(" - Config. {index} is still valid.", index=index)
+
+
+    def configuration_obsolete(self, index, path):
+        if path:
+            self._print(" - Config. {index} is obsolete, moved to '{path}'.",
+                        index=index,
+                        path=path)
+        else:
+            self._print(" - Config. {index} is obsolete, removed.", index=index)
+
+
+    def upper_bound(self, upper_bound):
+        if upper_bound is None:
+            self._print("Upper bound: unknown (some variables have no domain).")
+        else:
+            self._print("Upper bound: {bound} configuration(s).", bound=upper_bound)
+
+
+    def configurations_counted(self, count, limit):
+        if count >= limit:
+            self._print("Found at least {count} valid configuration(s)"
+                        " (stopped at the limit).", count=count)
+        else:
+            self._print("Found exactly {count} valid configuration(s).",
+                        count=count)
+
+
+    def limit_reached(self, limit):
+        self._print("\nStopped after {limit} configuration(s), as requested.",
+                    limit=limit)
+
+
     def configurations_loaded(self, path):
         self._print("Loading configurations from '{path}' ...", path=path)
 
 
+    def configuration_exported(self, path):
+        self._print(" - Exported '{path}'.", path=path)
+
+
+    def configuration_rendered(self, path):
+        self._print(" - Rendered '{path}'.", path=path)
+
+
+    def svg_conversion_failed(self, path, error):
+        self._print(" - Could not convert '{path}' into SVG ({error}).",
+                    path=path,
+                    error=str(error))
+        self._print("   Is Graphviz ('dot') installed?")
+
+
     def configuration_realized(self, path):
         self._print(" - Built configuration '{path}.", path=path)
 
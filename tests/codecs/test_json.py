@@ -0,0 +1,67 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.codecs.json import JSON
+from camp.entities.model import Model, Component, Service, Variable, \
+    Goals, Instance, Configuration
+
+from StringIO import StringIO
+
+from unittest import TestCase
+
+
+
+class ConfigurationsAreStreamed(TestCase):
+
+
+    def setUp(self):
+        self._codec = JSON()
+        self._model = Model(
+            [
+                Component("server",
+                          provided_services=[Service("Awesome")],
+                          variables=[Variable("memory", "Symbols", ["1GB", "2GB"])]),
+                Component("client",
+                          required_services=[Service("Awesome")])
+            ],
+            Goals(services=[Service("Awesome")]))
+
+
+    def _configuration(self, memory):
+        server = self._model.resolve("server")
+        client = self._model.resolve("client")
+        server_0 = Instance("server_0", server, [(server.variables[0], memory)])
+        client_0 = Instance("client_0", client)
+        client_0.service_providers = [server_0]
+        return Configuration(self._model, [server_0, client_0])
+
+
+    def test_one_line_per_configuration(self):
+        stream = StringIO()
+
+        self._codec.save_configurations([self._configuration("1GB"),
+                                         self._configuration("2GB")],
+                                        stream)
+
+        self.assertEqual(2, len(stream.getvalue().splitlines()))
+
+
+    def test_configurations_are_read_back(self):
+        expected = [self._configuration("1GB"), self._configuration("2GB")]
+        stream = StringIO()
+        self._codec.save_configurations(expected, stream)
+
+        stream.seek(0)
+        loaded = list(self._codec.load_configurations_from(self._model, stream))
+
+        self.assertEqual([each.signature for each in expected],
+                         [each.signature for each in loaded])
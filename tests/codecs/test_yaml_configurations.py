@@ -0,0 +1,71 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.codecs.yaml import YAML
+from camp.entities.model import Model, Component, Service, Variable, Goals
+
+from StringIO import StringIO
+
+from unittest import TestCase
+
+
+
+class ConfigurationsAreLoaded(TestCase):
+
+    CONFIGURATION = ("instances:\n"
+                     "  server_0:\n"
+                     "    definition: server\n"
+                     "    configuration:\n"
+                     "      memory: 2GB\n"
+                     "  proxy_0:\n"
+                     "    definition: proxy\n"
+                     "    service_providers: [ server_0 ]\n")
+
+
+    def setUp(self):
+        self._model = Model(
+            [
+                Component("server",
+                          provided_services=[Service("Awesome")],
+                          variables=[Variable("memory", "Symbols", ["1GB", "2GB"])]),
+                Component("proxy",
+                          provided_services=[Service("Proxy")],
+                          required_services=[Service("Awesome")])
+            ],
+            Goals(services=[Service("Proxy")]))
+
+
+    def test_instances_share_the_model_entities(self):
+        configurations = [YAML.load_configuration_from(self._model,
+                                                       StringIO(self.CONFIGURATION)) \
+                          for _ in range(2)]
+
+        for each in configurations:
+            server = each.resolve("server_0")
+            self.assertIs(self._model.resolve("server"), server.definition)
+            self.assertIs(self._model.resolve("server").variables[0],
+                          server.configuration[0][0])
+            self.assertIs(server, each.resolve("proxy_0").service_providers[0])
+
+
+    def test_unknown_components_are_reported(self):
+        text = self.CONFIGURATION.replace("definition: proxy", "definition: nginx")
+
+        with self.assertRaises(KeyError):
+            YAML.load_configuration_from(self._model, StringIO(text))
+
+
+    def test_unknown_variables_are_reported(self):
+        text = self.CONFIGURATION.replace("memory: 2GB", "disk: 2GB")
+
+        with self.assertRaises(RuntimeError):
+            YAML.load_configuration_from(self._model, StringIO(text))
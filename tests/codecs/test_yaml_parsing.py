@@ -247,6 +247,32 @@ class BuiltModelAreComplete(TestCase):
 
 
 
+    def test_given_a_component_with_several_instances(self):
+        model = self._codec.load_model_from(StringIO(
+            "components:\n"
+            "   server:\n"
+            "      provides_services: [ Wonderful ]\n"
+            "      max_instances: 3\n"
+            "goals:\n"
+            "   running:\n"
+            "      - Wonderful\n"))
+
+        self.assertEqual(0, len(self._codec.warnings))
+        self.assertEqual(3, model.resolve("server").max_instances)
+
+
+    def test_given_a_component_without_instance_bound(self):
+        model = self._codec.load_model_from(StringIO(
+            "components:\n"
+            "   server:\n"
+            "      provides_services: [ Wonderful ]\n"
+            "goals:\n"
+            "   running:\n"
+            "      - Wonderful\n"))
+
+        self.assertEqual(1, model.resolve("server").max_instances)
+
+
     def assert_complete(self, text, expectations):
         model = self._codec.load_model_from(StringIO(text))
 
@@ -505,6 +531,20 @@ class TypeMismatchAreReported(TestCase):
             path="components/server/variables")
 
 
+    def test_with_a_string_as_max_instances(self):
+        self.assert_warning(
+            "components: \n"
+            "   server:\n"
+            "      provides_services: [ Wonderful ]\n"
+            "      max_instances: many\n"
+            "goals:\n"
+            "   running:\n"
+            "      - Wonderful\n",
+            expected="int",
+            found="str",
+            path="components/server/max_instances")
+
+
     def test_with_a_string_as_implementation(self):
         self.assert_warning(
             "components: \n"
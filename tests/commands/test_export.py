@@ -0,0 +1,51 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from unittest import TestCase
+
+from camp.commands import Command, Export
+
+
+
+class ExportOptionsAreAccepted(TestCase):
+
+
+    def test_given_no_filter(self):
+        command = Command.extract_from(["export", "-d", "my/directory"])
+
+        self.assertIsInstance(command, Export)
+        self.assertIsNone(command.indices)
+        self.assertIsNone(command.component)
+        self.assertIsNone(command.variable)
+        self.assertIsNone(command.source)
+
+
+    def test_given_filters(self):
+        command_line = "export -i 1 2 --component server --where memory=2GB"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.indices, [1, 2])
+        self.assertEqual(command.component, "server")
+        self.assertEqual(command.variable, "memory")
+        self.assertEqual(command.value, "2GB")
+
+
+    def test_given_a_stream(self):
+        command = Command.extract_from(["export", "--from", "out.ndjson"])
+
+        self.assertEqual("out.ndjson", command.source)
+
+
+    def test_given_a_malformed_assignment(self):
+        with self.assertRaises(SystemExit):
+            Command.extract_from(["export", "--where", "memory"])
@@ -102,3 +102,286 @@ class LongOptionsAreAccepted(TestCase):
 
         self.assertIsInstance(command, Generate)
         self.assertFalse(command.only_coverage)
+
+
+
+class JobsAreAccepted(TestCase):
+
+
+    def test_given_no_jobs(self):
+        command_line = "generate --all"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.jobs, Generate.DEFAULT_JOBS)
+
+
+    def test_given_short_option(self):
+        command_line = "generate --all -j 4"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.jobs, 4)
+
+
+    def test_given_long_option(self):
+        command_line = "generate --all --jobs 4"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.jobs, 4)
+
+
+
+class IncrementalIsAccepted(TestCase):
+
+
+    def test_given_no_incremental(self):
+        command_line = "generate --all"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.incremental, Generate.DEFAULT_INCREMENTAL)
+
+
+    def test_given_short_option(self):
+        command_line = "generate --all -i"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.incremental)
+
+
+    def test_given_long_option(self):
+        command_line = "generate --all --incremental"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.incremental)
+
+
+
+class CacheIsAccepted(TestCase):
+
+
+    def test_given_no_cache(self):
+        command_line = "generate --all"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertIsNone(command.cache)
+        self.assertEqual(command.cache_size, Generate.DEFAULT_CACHE_SIZE)
+
+
+    def test_given_cache_without_directory(self):
+        command_line = "generate --all --solution-cache"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.cache, Generate.DEFAULT_CACHE_DIRECTORY)
+
+
+    def test_given_cache_directory_and_size(self):
+        command_line = "generate --all --solution-cache my/cache --solution-cache-size 3"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.cache, "my/cache")
+        self.assertEqual(command.cache_size, 3)
+
+
+
+class CoverageEnginesAreAccepted(TestCase):
+
+
+    def test_given_no_engine(self):
+        command_line = "generate --coverage"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.only_coverage)
+        self.assertEqual(command.coverage_engine,
+                         Generate.DEFAULT_COVERAGE_ENGINE)
+
+
+    def test_given_the_greedy_engine(self):
+        command_line = "generate --coverage greedy"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.only_coverage)
+        self.assertEqual(command.coverage_engine, Generate.GREEDY)
+
+
+    def test_given_the_optimize_engine(self):
+        command_line = "generate -c optimize -d my/directory"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.only_coverage)
+        self.assertEqual(command.coverage_engine, Generate.OPTIMIZE)
+
+
+    def test_given_the_t_wise_engine(self):
+        command_line = "generate --coverage t-wise --strength 3"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.coverage_engine, Generate.T_WISE)
+        self.assertEqual(command.strength, 3)
+
+
+    def test_given_no_strength(self):
+        command_line = "generate --coverage t-wise"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.strength, Generate.DEFAULT_STRENGTH)
+
+
+    def test_given_a_null_strength(self):
+        command_line = "generate --coverage t-wise --strength 0"
+
+        with self.assertRaises(SystemExit):
+            Command.extract_from(command_line.split())
+
+
+
+class EstimateAndLimitAreAccepted(TestCase):
+
+
+    def test_given_neither_estimate_nor_limit(self):
+        command_line = "generate --all"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertFalse(command.estimate)
+        self.assertIsNone(command.limit)
+
+
+    def test_given_short_options(self):
+        command_line = "generate --all -e -l 10"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.estimate)
+        self.assertEqual(command.limit, 10)
+
+
+    def test_given_long_options(self):
+        command_line = "generate --coverage --estimate --limit 5"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertTrue(command.estimate)
+        self.assertEqual(command.limit, 5)
+
+
+    def test_given_a_null_limit(self):
+        command_line = "generate --all --limit 0"
+
+        with self.assertRaises(SystemExit):
+            Command.extract_from(command_line.split())
+
+
+
+class SamplingIsAccepted(TestCase):
+
+
+    def test_given_no_sample(self):
+        command_line = "generate --all"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertIsNone(command.sample)
+        self.assertIsNone(command.seed)
+
+
+    def test_given_a_sample_and_a_seed(self):
+        command_line = "generate -s 10 --seed 42"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.sample, 10)
+        self.assertEqual(command.seed, 42)
+
+
+    def test_given_a_null_sample(self):
+        command_line = "generate -s 0"
+
+        with self.assertRaises(SystemExit):
+            Command.extract_from(command_line.split())
+
+
+
+class StreamingIsAccepted(TestCase):
+
+
+    def test_given_no_stream(self):
+        command = Command.extract_from(["generate", "--all"])
+
+        self.assertIsNone(command.stream)
+
+
+    def test_given_the_standard_output(self):
+        command = Command.extract_from(["generate", "--all", "--stream"])
+
+        self.assertEqual(command.stream, Generate.STANDARD_OUTPUT)
+
+
+    def test_given_a_file(self):
+        command_line = "generate --all --stream out.ndjson"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.stream, "out.ndjson")
+
+
+
+class FormatsAreAccepted(TestCase):
+
+
+    def test_given_no_format(self):
+        command = Command.extract_from(["generate", "--all"])
+
+        self.assertEqual(command.formats, Generate.DEFAULT_FORMATS)
+
+
+    def test_given_several_formats(self):
+        command_line = "generate --all --formats yaml,dot,json"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.formats,
+                         [Generate.YAML, Generate.DOT, Generate.JSON])
+
+
+    def test_given_formats_without_yaml(self):
+        command_line = "generate --all --formats dot"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.formats, [Generate.YAML, Generate.DOT])
+
+
+    def test_given_an_unknown_format(self):
+        command_line = "generate --all -f yaml,png"
+
+        with self.assertRaises(SystemExit):
+            Command.extract_from(command_line.split())
+
+
+
+class StoresAreAccepted(TestCase):
+
+
+    def test_given_no_store(self):
+        command = Command.extract_from(["generate", "--all"])
+
+        self.assertEqual(command.store, Generate.DEFAULT_STORE)
+
+
+    def test_given_the_sqlite_store(self):
+        command = Command.extract_from(["generate", "--all", "--store", "sqlite"])
+
+        self.assertEqual(command.store, Generate.SQLITE)
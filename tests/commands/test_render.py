@@ -0,0 +1,39 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from unittest import TestCase
+
+from camp.commands import Command, Render
+
+
+
+class RenderOptionsAreAccepted(TestCase):
+
+
+    def test_given_no_option(self):
+        command = Command.extract_from(["render"])
+
+        self.assertIsInstance(command, Render)
+        self.assertEqual(command.working_directory,
+                         Render.DEFAULT_WORKING_DIRECTORY)
+        self.assertIsNone(command.indices)
+        self.assertFalse(command.svg)
+
+
+    def test_given_indices_and_svg(self):
+        command_line = "render -d my/directory -i 1 3 --svg"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.working_directory, "my/directory")
+        self.assertEqual(command.indices, [1, 3])
+        self.assertTrue(command.svg)
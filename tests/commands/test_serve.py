@@ -0,0 +1,56 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from unittest import TestCase
+
+from camp.commands import Command, Serve
+
+
+
+class ServeOptionsAreAccepted(TestCase):
+
+
+    def test_given_no_option(self):
+        command = Command.extract_from(["serve"])
+
+        self.assertIsInstance(command, Serve)
+        self.assertEqual(command.host, Serve.DEFAULT_HOST)
+        self.assertEqual(command.port, Serve.DEFAULT_PORT)
+        self.assertIsNone(command.token)
+        self.assertFalse(command.remote)
+
+
+    def test_given_host_and_port(self):
+        command_line = "serve --host 0.0.0.0 -p 9000"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.host, "0.0.0.0")
+        self.assertEqual(command.port, 9000)
+
+
+    def test_given_a_token_and_a_remote_host(self):
+        command_line = "serve --host 0.0.0.0 --remote --token secret"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.token, "secret")
+        self.assertTrue(command.remote)
+
+
+    def test_given_a_server_to_generate(self):
+        command_line = "generate --all --server http://localhost:9000 --token secret"
+
+        command = Command.extract_from(command_line.split())
+
+        self.assertEqual(command.server, "http://localhost:9000")
+        self.assertEqual(command.token, "secret")
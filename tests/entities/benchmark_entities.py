@@ -0,0 +1,147 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+"""
+Measure the time needed to load and to validate a large synthetic
+model, the time spent walking its entities the way the generator does,
+and the memory its entities occupy. This is not part of the test
+suite. Run it with:
+
+    $ python -m tests.entities.benchmark_entities [COMPONENTS]
+"""
+
+
+
+from camp.codecs.yaml import YAML
+from camp.entities.validation import Checker, InvalidModel
+
+from gc import get_referents
+
+from sys import argv, getsizeof
+
+from time import time
+
+from types import ModuleType
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+
+DEFAULT_SIZE = 2000
+
+VARIABLES = 5
+
+VALUES = 8
+
+WALKS = 20
+
+
+
+def synthetic_model(size):
+    """
+    A chain of components, each providing a service and a feature,
+    requiring those of the next one, and having a few variables.
+    """
+    lines = ["goals:", "  running: [ S0 ]", "components:"]
+    for index in range(size):
+        lines.append("  c%d:" % index)
+        lines.append("    provides_services: [ S%d ]" % index)
+        lines.append("    provides_features: [ F%d ]" % index)
+        if index + 1 < size:
+            lines.append("    requires_services: [ S%d ]" % (index + 1))
+            lines.append("    requires_features: [ F%d ]" % (index + 1))
+        lines.append("    variables:")
+        for each_variable in range(VARIABLES):
+            values = ", ".join("v%d" % v for v in range(VALUES))
+            lines.append("      x%d:" % each_variable)
+            lines.append("        values: [ %s ]" % values)
+        lines.append("    implementation:")
+        lines.append("      docker:")
+        lines.append("        image: c%d:latest" % index)
+    return "\n".join(lines) + "\n"
+
+
+
+def walk(model):
+    """
+    Go through the entities as the generator and the checker do, in
+    nested loops.
+    """
+    count = 0
+    for each_component in model.components:
+        for each_variable in each_component.variables:
+            for each_value in each_variable.domain:
+                count += len(each_component.provided_services) \
+                         + len(each_component.required_services) \
+                         + len(each_variable.realization)
+    return count
+
+
+
+def footprint(model):
+    """
+    The number of bytes that the objects reachable from the given
+    model occupy.
+    """
+    seen = set()
+    pending = [model]
+    total = 0
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, (type, ModuleType)):
+            continue
+        seen.add(id(current))
+        total += getsizeof(current)
+        pending.extend(get_referents(current))
+    return total
+
+
+
+def measure(size):
+    text = synthetic_model(size)
+
+    start = time()
+    model = YAML().load_model_from(StringIO(text))
+    loading = time() - start
+
+    start = time()
+    try:
+        model.accept(Checker())
+    except InvalidModel:
+        pass
+    validation = time() - start
+
+    start = time()
+    for _ in range(WALKS):
+        walk(model)
+    walking = time() - start
+
+    return loading, validation, walking, footprint(model)
+
+
+
+def main(arguments):
+    size = int(arguments[0]) if arguments else DEFAULT_SIZE
+    loading, validation, walking, memory = measure(size)
+    print("%-12s %10s" % ("components", size))
+    print("%-12s %10.3f" % ("load (s)", loading))
+    print("%-12s %10.3f" % ("check (s)", validation))
+    print("%-12s %10.3f" % ("walk (s)", walking))
+    print("%-12s %10.1f" % ("memory (MB)", memory / 1e6))
+
+
+
+if __name__ == "__main__":
+    main(argv[1:])
@@ -0,0 +1,92 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.model import Model, Component, Service, Feature, \
+    Goals, Instance, Configuration
+
+from unittest import TestCase
+
+
+
+class StacksAreFound(TestCase):
+
+
+    def setUp(self):
+        self._model = Model([Component("server",
+                                       provided_services=[Service("Awesome")],
+                                       required_services=[Service("DB")],
+                                       required_features=[Feature("JDK")]),
+                             Component("db",
+                                       provided_services=[Service("DB")],
+                                       required_features=[Feature("Linux")]),
+                             Component("jdk",
+                                       provided_features=[Feature("JDK")],
+                                       required_features=[Feature("Linux")]),
+                             Component("linux",
+                                       provided_features=[Feature("Linux")])],
+                            Goals(services=[Service("Awesome")]))
+        self._server = Instance("server_0", self._model.resolve("server"))
+        self._db = Instance("db_0", self._model.resolve("db"))
+        self._jdk = Instance("jdk_0", self._model.resolve("jdk"))
+        self._linux = Instance("linux_0", self._model.resolve("linux"))
+        self._server.feature_provider = self._jdk
+        self._server.service_providers = [self._db]
+        self._jdk.feature_provider = self._linux
+        self._db.feature_provider = self._linux
+        self._configuration = Configuration(self._model,
+                                            [self._server, self._db,
+                                             self._jdk, self._linux])
+
+
+    def test_one_stack_per_instance_that_hosts_nothing(self):
+        self.assertEqual([["server_0", "jdk_0", "linux_0"],
+                          ["db_0", "linux_0"]],
+                         self._names(self._configuration.stacks))
+
+
+    def test_hosts_come_first(self):
+        self.assertEqual(["linux_0", "jdk_0", "server_0", "db_0"],
+                         [each.name for each in self._configuration.hosting_order])
+
+
+    def test_providers_know_who_they_serve(self):
+        self.assertEqual((self._jdk, self._db), self._linux.hosted_instances)
+        self.assertEqual((self._server,), self._db.consumers)
+
+
+    def test_stacks_are_cached(self):
+        self.assertIs(self._configuration.stacks, self._configuration.stacks)
+
+
+    def test_stacks_follow_new_providers(self):
+        self._configuration.stacks
+        self._server.feature_provider = None
+
+        self.assertEqual([["server_0"],
+                          ["db_0", "linux_0"],
+                          ["jdk_0", "linux_0"]],
+                         self._names(self._configuration.stacks))
+        self.assertEqual((), self._jdk.hosted_instances)
+
+
+    def test_other_configurations_keep_their_stacks(self):
+        other = Configuration(self._model, [self._db, self._linux])
+        stacks = other.stacks
+
+        self._server.feature_provider = None
+
+        self.assertIs(stacks, other.stacks)
+
+
+    @staticmethod
+    def _names(stacks):
+        return [[each.name for each in each_stack] for each_stack in stacks]
@@ -0,0 +1,109 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.decomposition import Decomposition
+from camp.entities.model import Model, Service, Feature, Component, Goals
+
+from unittest import TestCase
+
+
+
+class IndependentPartsAreFound(TestCase):
+
+
+    def setUp(self):
+        self._components = [
+            Component("server",
+                      provided_services=[Service("Awesome")],
+                      required_features=[Feature("Python")]),
+            Component("python",
+                      provided_features=[Feature("Python")]),
+            Component("agent",
+                      required_features=[Feature("Monitoring")]),
+            Component("monitor",
+                      provided_features=[Feature("Monitoring")]),
+            Component("probe")
+        ]
+        self._constraints = []
+
+
+    def test_the_first_part_provides_the_services(self):
+        parts = self._decompose()
+
+        self.assertEqual(["python", "server"], self._names_in(parts[0]))
+        self.assertEqual((Service("Awesome"),), parts[0].goals.services)
+
+
+    def test_the_other_parts_share_nothing(self):
+        parts = self._decompose()
+
+        self.assertEqual([["agent", "monitor"], ["probe"]],
+                         [self._names_in(each) for each in parts[1:]])
+        self.assertEqual((), parts[1].goals.services)
+
+
+    def test_constraints_go_to_the_parts_they_name(self):
+        self._constraints = ["CInstance.exists(ci, ci.definition == probe)",
+                             "server_0_threads.value > 2"]
+
+        parts = self._decompose()
+
+        self.assertEqual((self._constraints[1],), parts[0].constraints)
+        self.assertEqual((self._constraints[0],), parts[2].constraints)
+
+
+    def test_instance_identifiers_merge_their_components(self):
+        self._constraints = ["monitor_0_port.value == server_0_port.value"]
+
+        parts = self._decompose()
+
+        self.assertEqual(2, len(parts))
+        self.assertEqual(["agent", "monitor", "python", "server"],
+                         self._names_in(parts[0]))
+
+
+    def test_constraints_that_name_no_component_keep_the_model_whole(self):
+        self._constraints = ["CInstance.all_instances().count() < 4"]
+        model = Model(self._components,
+                      Goals(services=[Service("Awesome")]),
+                      self._constraints)
+
+        self.assertEqual([model], Decomposition().apply(model))
+
+
+    def test_constraints_merge_the_parts_they_name(self):
+        self._constraints = ["Implies(CInstance.exists(ci, ci.definition == probe),"
+                             " CInstance.exists(ci, ci.definition == server))"]
+
+        parts = self._decompose()
+
+        self.assertEqual(2, len(parts))
+        self.assertEqual(["probe", "python", "server"], self._names_in(parts[0]))
+
+
+    def test_models_with_a_single_part_are_untouched(self):
+        self._components = self._components[:2]
+        model = Model(self._components, Goals(services=[Service("Awesome")]))
+
+        self.assertEqual([model], Decomposition().apply(model))
+
+
+    def _decompose(self):
+        model = Model(self._components,
+                      Goals(services=[Service("Awesome")]),
+                      self._constraints)
+        return Decomposition().apply(model)
+
+
+    @staticmethod
+    def _names_in(part):
+        return sorted(each.name for each in part.components)
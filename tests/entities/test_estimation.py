@@ -0,0 +1,53 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.model import Model, Component, Service, Variable, Goals
+
+from unittest import TestCase
+
+
+
+class UpperBoundIsEstimated(TestCase):
+
+
+    @staticmethod
+    def _create_model(server_instances=1, memory=None):
+        memory = memory or Variable("memory", "Symbols", ["1GB", "2GB"])
+        return Model(
+            [
+                Component("server",
+                          provided_services=[Service("Awesome")],
+                          variables=[memory],
+                          max_instances=server_instances),
+                Component("proxy",
+                          provided_services=[Service("Proxy")],
+                          required_services=[Service("Awesome")])
+            ],
+            Goals(services=[Service("Proxy")]))
+
+
+    def test_given_single_instances(self):
+        model = self._create_model()
+
+        self.assertEqual(3 * 2, model.upper_bound)
+
+
+    def test_given_interchangeable_instances(self):
+        model = self._create_model(server_instances=2)
+
+        self.assertEqual((2 + 1) ** 2 * (1 + 2), model.upper_bound)
+
+
+    def test_given_an_integer_variable_without_domain(self):
+        model = self._create_model(memory=Variable("memory", "Integer", []))
+
+        self.assertIsNone(model.upper_bound)
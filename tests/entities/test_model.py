@@ -0,0 +1,111 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.model import Model, Component, Service, Feature, \
+    Variable, Goals, Instance
+
+from unittest import TestCase
+
+
+
+class ModelsAreIndexed(TestCase):
+
+
+    def setUp(self):
+        self._memory = Variable("memory", "Symbols", ["1GB", "2GB"])
+        self._server = Component("server",
+                                 provided_services=[Service("Awesome")],
+                                 required_features=[Feature("Python")],
+                                 variables=[self._memory])
+        self._python = Component("python",
+                                 provided_features=[Feature("Python")])
+        self._model = Model([self._server, self._python],
+                            Goals(services=[Service("Awesome")]))
+
+
+    def test_services_and_features_are_resolved(self):
+        self.assertIs(self._server, self._model.resolve("server"))
+        self.assertEqual(Service("Awesome"), self._model.resolve("Awesome"))
+        self.assertEqual(Feature("Python"), self._model.resolve("Python"))
+
+
+    def test_unknown_names_are_reported(self):
+        with self.assertRaises(KeyError):
+            self._model.resolve("nginx")
+
+
+    def test_membership(self):
+        self.assertIn(Service("Awesome"), self._model)
+        self.assertIn(Feature("Python"), self._model)
+        self.assertNotIn(Service("Python"), self._model)
+        self.assertNotIn(Feature("Awesome"), self._model)
+
+
+    def test_providers_are_indexed(self):
+        self.assertEqual([self._python], self._model.providers_of(Feature("Python")))
+        self.assertEqual([], self._model.providers_of(Service("Python")))
+
+
+    def test_variables_are_indexed(self):
+        self.assertIs(self._memory, self._model.variable_named("server", "memory"))
+        self.assertIsNone(self._model.variable_named("python", "memory"))
+
+
+
+class EntitiesAreImmutable(TestCase):
+
+
+    def setUp(self):
+        self._memory = Variable("memory", "Symbols", ["1GB", "2GB"])
+        self._services = [Service("Awesome")]
+        self._server = Component("server",
+                                 provided_services=self._services,
+                                 variables=[self._memory])
+
+
+    def test_accessors_do_not_copy(self):
+        self.assertIs(self._server.provided_services,
+                      self._server.provided_services)
+        self.assertIs(self._memory.domain, self._memory.domain)
+
+
+    def test_accessors_are_read_only(self):
+        with self.assertRaises(AttributeError):
+            self._server.provided_services.append(Service("Other"))
+
+
+    def test_later_changes_to_arguments_are_ignored(self):
+        self._services.append(Service("Other"))
+
+        self.assertEqual((Service("Awesome"),), self._server.provided_services)
+
+
+    def test_no_attribute_can_be_added(self):
+        with self.assertRaises(AttributeError):
+            self._server.extra = "whatever"
+
+
+    def test_models_accept_no_attribute_either(self):
+        model = Model([self._server], Goals(services=self._services))
+
+        with self.assertRaises(AttributeError):
+            model.extra = "whatever"
+
+
+    def test_instances_expose_read_only_providers_and_values(self):
+        server_0 = Instance("server_0", self._server, [(self._memory, "1GB")])
+        server_0.service_providers = [Instance("db_0", self._server)]
+
+        with self.assertRaises(AttributeError):
+            server_0.service_providers.append(server_0)
+        with self.assertRaises(AttributeError):
+            server_0.configuration.append((self._memory, "2GB"))
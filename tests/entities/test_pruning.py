@@ -0,0 +1,135 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.entities.model import Model, Service, Feature, Component, \
+    Variable, Goals
+from camp.entities.pruning import Pruning
+
+from unittest import TestCase
+
+
+
+class ImpossibleComponentsArePruned(TestCase):
+
+
+    def setUp(self):
+        self._components = [
+            Component("server",
+                      provided_services=[Service("Awesome")],
+                      required_features=[Feature("Python")],
+                      variables=[Variable("memory", "Symbols", ["1GB"])]),
+            Component("python",
+                      provided_features=[Feature("Python")]),
+            Component("agent",
+                      required_features=[Feature("Linux")]),
+            Component("linux",
+                      provided_features=[Feature("Linux")]),
+            Component("database",
+                      provided_services=[Service("Storage")]),
+            Component("cache",
+                      provided_services=[Service("Caching")],
+                      required_services=[Service("Storage")]),
+            Component("mailer",
+                      required_services=[Service("SMTP")]),
+            Component("windows",
+                      provided_features=[Feature("Windows")])
+        ]
+        self._constraints = []
+        self._pruning = Pruning()
+
+
+    def test_impossible_components_are_removed(self):
+        model = self._prune()
+
+        self.assertItemsEqual(["server", "python", "agent", "linux"],
+                              [each.name for each in model.components])
+        self.assertEqual(["cache", "database", "mailer", "windows"],
+                         self._pruning.removed_components)
+
+
+    def test_disconnected_feature_stacks_are_kept(self):
+        model = self._prune()
+
+        self.assertIn("agent", [each.name for each in model.components])
+        self.assertIn("linux", [each.name for each in model.components])
+
+
+    def test_unconsumed_services_are_kept_when_the_goals_are_consumed(self):
+        self._components.append(Component("tester",
+                                          required_services=[Service("Awesome")]))
+
+        model = self._prune()
+
+        self.assertItemsEqual(["server", "python", "agent", "linux",
+                               "database", "cache", "tester"],
+                              [each.name for each in model.components])
+
+
+    def test_hosts_must_provide_all_the_required_features(self):
+        self._components.append(Component("jdk",
+                                          required_features=[Feature("Linux"),
+                                                             Feature("Java")]))
+        self._components.append(Component("java",
+                                          provided_features=[Feature("Java")]))
+
+        self._prune()
+
+        self.assertIn("jdk", self._pruning.removed_components)
+        self.assertIn("java", self._pruning.removed_components)
+
+
+    def test_components_named_in_constraints_are_kept(self):
+        self._constraints = ["CInstance.exists(ci, ci.definition == cache)"]
+
+        model = self._prune()
+
+        self.assertItemsEqual(["server", "python", "agent", "linux",
+                               "database", "cache"],
+                              [each.name for each in model.components])
+
+
+    def test_components_whose_variables_constraints_name_are_kept(self):
+        self._components.append(Component("monitor",
+                                          provided_services=[Service("Monitoring")],
+                                          variables=[Variable("rate", "Integer", [1, 2])]))
+        self._constraints = ["monitor_0_rate.value == 1"]
+
+        model = self._prune()
+
+        self.assertIn("monitor", [each.name for each in model.components])
+
+
+    def test_providers_of_services_constraints_name_are_kept(self):
+        self._constraints = ["Partner.exists(partner, partner.service == Storage)"]
+
+        model = self._prune()
+
+        self.assertIn("database", [each.name for each in model.components])
+
+
+    def test_variables_with_a_single_value_are_reported(self):
+        self._prune()
+
+        self.assertEqual(["server::memory"], self._pruning.fixed_variables)
+
+
+    def test_models_without_impossible_components_are_untouched(self):
+        model = Model(self._components[:4], Goals(services=[Service("Awesome")]))
+
+        self.assertIs(model, self._pruning.apply(model))
+
+
+    def _prune(self):
+        model = Model(self._components,
+                      Goals(services=[Service("Awesome")]),
+                      self._constraints)
+        return self._pruning.apply(model)
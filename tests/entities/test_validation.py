@@ -11,6 +11,9 @@
 
 from unittest import TestCase
 
+from StringIO import StringIO
+
+from camp.codecs.yaml import YAML
 from camp.entities.model import Model, Service, Feature, Component, \
     Variable, Goals, DockerFile
 from camp.entities.validation import *
@@ -35,6 +38,15 @@ class TestModelIsInvalid(TestCase):
         self._verify_errors(NoGoal)
 
 
+    def test_when_nothing_is_provided_nor_required(self):
+        self._components = [Component(name="c1")]
+        self._goals = Goals()
+
+        self._validate_model()
+
+        self._verify_errors(NoGoal, NoServiceAndNoFeature)
+
+
     def test_when_no_one_provides_a_required_service(self):
         self._components = [Component(name="c1",
                                       provided_services=[Service("Awesome")])]
@@ -65,6 +77,16 @@ class TestModelIsInvalid(TestCase):
         self._verify_errors(EmptyVariableDomain)
 
 
+    def test_when_a_component_allows_no_instance(self):
+        self._components = [Component(name="c1",
+                                      provided_services=[Service("S1")],
+                                      max_instances=0)]
+
+        self._validate_model()
+
+        self._verify_errors(InvalidInstanceBound)
+
+
     def test_when_a_docker_file_does_not_exists(self):
         self._components = [Component(name="c1",
                                       provided_services=[Service("S1")],
@@ -92,3 +114,80 @@ class TestModelIsInvalid(TestCase):
 
         except InvalidModel as error:
             self._errors = error.errors
+
+
+
+class ErrorsAreLocated(TestCase):
+
+
+    def setUp(self):
+        self._codec = YAML()
+
+
+    def test_missing_providers_point_to_their_first_consumer(self):
+        errors = self._check("goals:\n"
+                             "  running: [ Awesome ]\n"
+                             "components:\n"
+                             "  server:\n"
+                             "    provides_services: [ Awesome ]\n"
+                             "    requires_features: [ JDK ]\n")
+
+        self.assertEqual(1, len(errors))
+        self.assertEqual("components/server/requires_features", errors[0].path)
+        self.assertEqual((6, 5), errors[0].location)
+        self.assertIn("line 6, column 5", repr(errors[0]))
+
+
+    def test_empty_domains_point_to_their_variable(self):
+        errors = self._check("goals:\n"
+                             "  running: [ Awesome ]\n"
+                             "components:\n"
+                             "  server:\n"
+                             "    provides_services: [ Awesome ]\n"
+                             "    variables:\n"
+                             "      memory:\n"
+                             "        values: []\n")
+
+        self.assertEqual(1, len(errors))
+        self.assertEqual((7, 7), errors[0].location)
+
+
+    def test_errors_without_location_are_still_reported(self):
+        model = Model([Component("c1", max_instances=0,
+                                 provided_services=[Service("S1")])],
+                      Goals(services=[Service("S1")]))
+
+        with self.assertRaises(InvalidModel) as context:
+            model.accept(Checker())
+
+        self.assertIsNone(context.exception.errors[0].location)
+
+
+    def test_unsafe_constraints_point_to_their_entry(self):
+        errors = self._check("goals:\n"
+                             "  running: [ Awesome ]\n"
+                             "components:\n"
+                             "  server:\n"
+                             "    provides_services: [ Awesome ]\n"
+                             "constraints:\n"
+                             "  - CInstance.all_instances().count() > 0\n"
+                             "  - ().__class__.__bases__[0]\n")
+
+        self.assertEqual(2, len(errors))
+        self.assertIsInstance(errors[0], UnsafeConstraint)
+        self.assertEqual((8, 5), errors[0].location)
+
+
+    def test_keys_that_reach_internals_are_unsafe(self):
+        self.assertEqual(["__class__"],
+                         unsafe_identifiers("ci['__class__'] == ci"))
+
+
+    def _check(self, text):
+        model = self._codec.load_model_from(StringIO(text))
+        try:
+            model.accept(Checker(locations=self._codec.locations))
+            return []
+
+        except InvalidModel as error:
+            return error.errors
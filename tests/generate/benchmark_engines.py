@@ -0,0 +1,67 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+"""
+Compare the time needed to enumerate configurations using an
+optimizing solver and using an incremental solver, on the STAMP
+samples. This is not part of the test suite. Run it with:
+
+    $ python -m tests.generate.benchmark_engines [LIMIT]
+"""
+
+
+
+from camp.codecs.yaml import YAML
+from camp.directories import InputDirectory
+from camp.generate import Z3Problem
+
+from itertools import islice
+
+from os.path import join as join_paths
+
+from sys import argv
+
+from time import time
+
+
+
+SAMPLES = ["stamp/atos", "stamp/ow2", "stamp/activeeon", "stamp/xwiki"]
+
+DEFAULT_LIMIT = 20
+
+
+
+def measure(model, optimize, limit):
+    start = time()
+    problem = Z3Problem.from_model(model, optimize=optimize)
+    count = len(list(islice(problem.all_solutions(), limit)))
+    return count, time() - start
+
+
+
+def main(arguments):
+    limit = int(arguments[0]) if arguments else DEFAULT_LIMIT
+    print("%-18s %8s %12s %12s" % ("sample", "configs", "optimize (s)", "solver (s)"))
+    for each_sample in SAMPLES:
+        directory = InputDirectory(join_paths("samples", each_sample), YAML())
+        _, model, _ = directory.model
+        count, with_optimize = measure(model, True, limit)
+        _, with_solver = measure(model, False, limit)
+        print("%-18s %8d %12.2f %12.2f" % (each_sample,
+                                           count,
+                                           with_optimize,
+                                           with_solver))
+
+
+
+if __name__ == "__main__":
+    main(argv[1:])
@@ -12,6 +12,9 @@
 from unittest import TestCase
 
 from camp.entities.model import Model, Component, Service, Feature, Variable, Goals
+import camp.generate as generate
+
+from camp.entities.validation import InvalidModel
 from camp.generate import Context
 
 from ozepy import start_over
@@ -69,4 +72,51 @@ class LoadedContextIncludes(TestCase):
             for each_variable in each_component.variables:
                 qualified_name = "_".join([each_component.name, "0", each_variable.name])
                 self.assertIn(qualified_name, self._context)
-                    
+
+
+
+class ConstraintsAreCompiledOnce(TestCase):
+
+    def setUp(self):
+        generate.COMPILED_CONSTRAINTS.clear()
+        self._maximum = generate.MAXIMUM_COMPILED_CONSTRAINTS
+
+
+    def tearDown(self):
+        generate.MAXIMUM_COMPILED_CONSTRAINTS = self._maximum
+        generate.COMPILED_CONSTRAINTS.clear()
+
+
+    def test_the_same_constraint_reuses_its_code(self):
+        code = Context._compile("  1 + 1 ")
+
+        self.assertIs(code, Context._compile("  1 + 1 "))
+        self.assertEqual(2, eval(code))
+
+
+    def test_code_is_shared_by_all_contexts(self):
+        Context().evaluate("1 + 1")
+
+        self.assertEqual(2, Context().evaluate("1 + 1"))
+        self.assertEqual(["1 + 1"], list(generate.COMPILED_CONSTRAINTS))
+
+
+    def test_the_cache_is_emptied_once_full(self):
+        generate.MAXIMUM_COMPILED_CONSTRAINTS = 2
+        Context._compile("1")
+        Context._compile("2")
+
+        Context._compile("3")
+
+        self.assertEqual(["3"], list(generate.COMPILED_CONSTRAINTS))
+
+
+    def test_unsafe_constraints_are_not_evaluated(self):
+        with self.assertRaises(InvalidModel):
+            Context().evaluate("().__class__")
+        self.assertEqual({}, generate.COMPILED_CONSTRAINTS)
+
+
+    def test_builtins_are_out_of_reach(self):
+        with self.assertRaises(NameError):
+            Context().evaluate("open('camp.yml')")
@@ -120,3 +120,170 @@ class VariablesAreAssigned(TestCase):
             "      - MyService\n",
             configuration_count=3,
             expected_values={ "memory": [100, 150, 200]})
+
+
+
+class EnginesAreSelected(TestCase):
+
+    MODEL = ("components:\n"
+             "   server:\n"
+             "      provides_services: [ MyService ]\n"
+             "      variables:\n"
+             "         memory:\n"
+             "           values: [ 1GB, 2GB ]\n"
+             "goals:\n"
+             "   running:\n"
+             "      - MyService\n")
+
+
+    def setUp(self):
+        self._model = YAML().load_model_from(StringIO(self.MODEL))
+
+
+    def test_incremental_solver_finds_all_solutions(self):
+        solver = Z3Problem.from_model(self._model, optimize=False)
+
+        configurations = list(solver.all_solutions())
+
+        self.assertEqual(2, len(configurations))
+
+
+    def test_incremental_solver_cannot_compute_coverage(self):
+        solver = Z3Problem.from_model(self._model, optimize=False)
+
+        with self.assertRaises(AssertionError):
+            list(solver.coverage())
+
+
+
+class BlockingClausesAreMonitored(TestCase):
+
+
+    def test_one_clause_per_solution(self):
+        model = YAML().load_model_from(StringIO(EnginesAreSelected.MODEL))
+        solver = Z3Problem.from_model(model, optimize=False)
+
+        configurations = list(solver.all_solutions())
+
+        self.assertEqual(len(configurations), solver.statistics.count)
+        self.assertGreater(solver.statistics.last_size, 0)
+
+
+
+class CoverageIsTracked(TestCase):
+
+
+    def test_every_value_is_covered(self):
+        model = YAML().load_model_from(StringIO(EnginesAreSelected.MODEL))
+        solver = Z3Problem.from_model(model)
+
+        configurations = list(solver.coverage())
+
+        self.assertEqual(2, len(configurations))
+        self.assertEqual(set(["server"]), solver._context.covered_components)
+        self.assertEqual(2, len(solver._context.covered_values))
+
+
+
+class ConfigurationsAreSampled(TestCase):
+
+
+    MODEL = ("components:\n"
+             "   server:\n"
+             "      provides_services: [ MyService ]\n"
+             "      variables:\n"
+             "         memory:\n"
+             "           values: [ 1GB, 2GB, 4GB, 8GB ]\n"
+             "         threads:\n"
+             "           values: [ 1, 2, 4 ]\n"
+             "goals:\n"
+             "   running:\n"
+             "      - MyService\n")
+
+
+    def _sample(self, count, seed):
+        model = YAML().load_model_from(StringIO(self.MODEL))
+        solver = Z3Problem.from_model(model, optimize=False)
+        return [each.signature for each in solver.sample(count, seed)]
+
+
+    def test_sampled_configurations_are_distinct(self):
+        signatures = self._sample(5, seed=1)
+
+        self.assertEqual(5, len(set(signatures)))
+
+
+    def test_the_same_seed_yields_the_same_sample(self):
+        self.assertEqual(self._sample(3, seed=7), self._sample(3, seed=7))
+
+
+    def test_sampling_stops_when_configurations_run_out(self):
+        self.assertEqual(12, len(self._sample(20, seed=3)))
+
+
+    def test_samples_are_spread_evenly(self):
+        model = YAML().load_model_from(StringIO(self.LARGER_MODEL))
+        solver = Z3Problem.from_model(model, optimize=False)
+        counts = {}
+        for seed in range(self.DRAWS):
+            for each in solver.sample(1, seed):
+                counts[each.signature] = counts.get(each.signature, 0) + 1
+
+        self.assertEqual(36, len(counts))
+        self.assertLess(max(counts.values()), 3 * self.DRAWS // 36)
+
+    DRAWS = 360
+
+    LARGER_MODEL = MODEL.replace("goals:\n",
+                                 "         disk:\n"
+                                 "           values: [ HDD, SSD, NVMe ]\n"
+                                 "goals:\n")
+
+
+
+class PartitionsComeInOrder(TestCase):
+
+
+    MODEL = ("components:\n"
+             "  apache:\n"
+             "    provides_services: [ Awesome ]\n"
+             "    variables:\n"
+             "      memory:\n"
+             "        values: [1GB, 2GB]\n"
+             "  lighttpd:\n"
+             "    provides_services: [ Awesome ]\n"
+             "    variables:\n"
+             "      memory:\n"
+             "        values: [1GB, 2GB, 4GB, 8GB]\n"
+             "  nginx:\n"
+             "    provides_services: [ Awesome ]\n"
+             "    variables:\n"
+             "      memory:\n"
+             "        values: [1GB, 2GB, 4GB]\n"
+             "goals:\n"
+             "  running:\n"
+             "    - Awesome\n")
+
+
+    def test_two_runs_yield_the_same_order(self):
+        first_run = self._enumerate(jobs=3)
+
+        self.assertEqual(9, len(first_run))
+        self.assertEqual(first_run, self._enumerate(jobs=3))
+
+
+    def test_partitions_follow_one_another(self):
+        components = [each.instances[0].definition.name \
+                      for each in self._configurations(jobs=3)]
+
+        self.assertEqual(["apache"] * 2 + ["lighttpd"] * 4 + ["nginx"] * 3,
+                         components)
+
+
+    def _enumerate(self, jobs):
+        return [each.signature for each in self._configurations(jobs)]
+
+
+    def _configurations(self, jobs):
+        model = YAML().load_model_from(StringIO(self.MODEL))
+        return list(Z3Problem.all_solutions_in_parallel(model, jobs))
@@ -17,7 +17,7 @@ from camp.generate import Z3Problem
 from camp.realize import Builder
 
 from os import listdir, makedirs
-from os.path import join, isdir
+from os.path import join, isdir, isfile
 
 from re import match
 
@@ -106,6 +106,234 @@ class FilesAreGenerated(TestCase):
         self.assert_configuration_count_is(2)
 
 
+    def test_interchangeable_instances(self):
+        self.prepare_sample(
+            "components:\n"
+            "  app:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    requires_services: [ DB ]\n"
+            "  postgresql:\n"
+            "    provides_services: [ DB ]\n"
+            "    max_instances: 2\n"
+            "    variables:\n"
+            "      version:\n"
+            "        values: [v9, v10]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate()
+
+        self.assert_configuration_count_is(2)
+
+
+    def test_interchangeable_guests(self):
+        self.prepare_sample(
+            "components:\n"
+            "  app:\n"
+            "    provides_services: [ Awesome ]\n"
+            "  worker:\n"
+            "    requires_features: [ Linux ]\n"
+            "    max_instances: 2\n"
+            "  linux:\n"
+            "    provides_features: [ Linux ]\n"
+            "    max_instances: 2\n"
+            "    variables:\n"
+            "      distribution:\n"
+            "        values: [debian, ubuntu]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate()
+
+        # No worker (1), one or two workers on one host (2 + 2), or
+        # one worker on each of two hosts (3 pairs of distributions).
+        # Swapping the workers between the hosts yields nothing new.
+        self.assert_configuration_count_is(8)
+
+
+    def test_incremental_generation(self):
+        self.prepare_sample(self.VARIABLES % "1GB, 2GB")
+        self.invoke_camp_generate()
+
+        with open(join(self._working_directory, "camp.yaml"), "w") as stream:
+            stream.write(self.VARIABLES % "1GB, 2GB, 4GB")
+        self.invoke_camp_generate("--incremental")
+
+        self.assert_configuration_count_is(3)
+
+    VARIABLES = ("components:\n"
+                 "  server:\n"
+                 "    provides_services: [ Awesome ]\n"
+                 "    variables:\n"
+                 "      memory:\n"
+                 "        values: [ %s ]\n"
+                 "goals:\n"
+                 "  running:\n"
+                 "    - Awesome\n")
+
+
+    def test_greedy_coverage(self):
+        self.prepare_sample(self.VARIABLES % "1GB, 2GB, 4GB")
+
+        self.invoke_camp_generate("--coverage", "greedy")
+
+        self.assert_configuration_count_is(3)
+
+
+    def test_pairwise_coverage(self):
+        self.prepare_sample(
+            "components:\n"
+            "  server:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB]\n"
+            "      threads:\n"
+            "        values: [t8, t16]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate("--coverage", "t-wise", "--strength", "2")
+
+        self.assert_configuration_count_is(4)
+
+
+    def test_strength_above_the_number_of_factors(self):
+        self.prepare_sample(
+            "components:\n"
+            "  server:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB]\n"
+            "      threads:\n"
+            "        values: [t8, t16]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate("--coverage", "t-wise", "--strength", "5")
+
+        self.assert_configuration_count_is(4)
+
+
+    def test_parallel_enumeration(self):
+        self.prepare_sample(
+            "components:\n"
+            "  apache:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB]\n"
+            "  nginx:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB, 4GB]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate("--jobs", "2")
+
+        self.assert_configuration_count_is(5)
+
+
+    def test_independent_parts(self):
+        self.prepare_sample(
+            "components:\n"
+            "  apache:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB]\n"
+            "  probe:\n"
+            "    variables:\n"
+            "      rate:\n"
+            "        values: [low, high]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate()
+
+        self.assert_configuration_count_is(2 * 3)
+
+
+    def test_streamed_enumeration(self):
+        self.prepare_sample(
+            "components:\n"
+            "  apache:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB, 4GB]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+        destination = join(self.WORKING_DIRECTORY, "configurations.ndjson")
+
+        self.invoke_camp_generate("--stream", destination)
+
+        with open(destination) as stream:
+            self.assertEqual(3, len(stream.readlines()))
+
+
+    def test_graphs_are_optional(self):
+        self.prepare_sample(
+            "components:\n"
+            "  apache:\n"
+            "    provides_services: [ Awesome ]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+        folder = join(self.WORKING_DIRECTORY, "out", "config_1")
+
+        self.invoke_camp_generate()
+        self.assertFalse(isfile(join(folder, "configuration.dot")))
+
+        self.invoke_camp_generate("--formats", "yaml,dot,json")
+        self.assertTrue(isfile(join(folder, "configuration.dot")))
+        self.assertTrue(isfile(join(folder, "configuration.json")))
+
+
+    def test_graphs_are_rendered_later(self):
+        self.prepare_sample(
+            "components:\n"
+            "  apache:\n"
+            "    provides_services: [ Awesome ]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+        self.invoke_camp_generate()
+
+        camp = Camp(YAML(), Z3Problem, Builder())
+        Command.extract_from(["render", "-d", self.WORKING_DIRECTORY]).send_to(camp)
+
+        folder = join(self.WORKING_DIRECTORY, "out", "config_1")
+        self.assertTrue(isfile(join(folder, "configuration.dot")))
+
+
+    def test_limited_enumeration(self):
+        self.prepare_sample(
+            "components:\n"
+            "  apache:\n"
+            "    provides_services: [ Awesome ]\n"
+            "    variables:\n"
+            "      memory:\n"
+            "        values: [1GB, 2GB, 4GB]\n"
+            "goals:\n"
+            "  running:\n"
+            "    - Awesome\n")
+
+        self.invoke_camp_generate("--limit", "2")
+
+        self.assert_configuration_count_is(2)
+
+
     def prepare_sample(self, sample):
         self._working_directory = self.WORKING_DIRECTORY
         if isdir(self._working_directory):
@@ -117,9 +345,10 @@ class FilesAreGenerated(TestCase):
     WORKING_DIRECTORY = "tmp/generate"
 
 
-    def invoke_camp_generate(self):
+    def invoke_camp_generate(self, *options):
         camp = Camp(YAML(), Z3Problem, Builder())
-        command = Command.extract_from(["generate", "--all", "-d", self._working_directory])
+        command = Command.extract_from(["generate", "--all", "-d", self._working_directory] \
+                                       + list(options))
         command.send_to(camp)
 
 
@@ -0,0 +1,202 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.cache import ModelCache, SolutionCache
+from camp.codecs.yaml import YAML
+from camp.entities.model import Model, Component, Service, Variable, Goals, \
+    Instance, Configuration
+
+from os import listdir, makedirs, utime
+from os.path import isdir, join as join_paths
+
+from shutil import rmtree
+
+from unittest import TestCase
+
+
+
+class SolutionsAreCached(TestCase):
+
+
+    def setUp(self):
+        if isdir(self.DIRECTORY):
+            rmtree(self.DIRECTORY)
+        self._model = self._create_model(["1GB", "2GB"])
+        self._cache = SolutionCache(self.DIRECTORY, capacity=2)
+
+    DIRECTORY = "tmp/cache"
+
+
+    @staticmethod
+    def _create_model(values, order=None):
+        components = [
+            Component("server",
+                      provided_services=[Service("Awesome")],
+                      variables=[Variable("memory", "Symbols", values)]),
+            Component("proxy",
+                      provided_services=[Service("Proxy")])
+        ]
+        if order:
+            components.reverse()
+        return Model(components, Goals(services=[Service("Awesome")]))
+
+
+    def _configuration(self, value):
+        server = self._model.resolve("server")
+        instance = Instance("server_0", server, [(server.variables[0], value)])
+        return Configuration(self._model, [instance])
+
+
+    def test_key_does_not_depend_on_declaration_order(self):
+        reversed_model = self._create_model(["1GB", "2GB"], order="reversed")
+
+        self.assertEqual(SolutionCache.key_for(self._model, "all"),
+                         SolutionCache.key_for(reversed_model, "all"))
+
+
+    def test_key_depends_on_mode(self):
+        self.assertNotEqual(SolutionCache.key_for(self._model, "all"),
+                            SolutionCache.key_for(self._model, "coverage"))
+
+
+    def test_key_depends_on_variable_domains(self):
+        other_model = self._create_model(["1GB", "4GB"])
+
+        self.assertNotEqual(SolutionCache.key_for(self._model, "all"),
+                            SolutionCache.key_for(other_model, "all"))
+
+
+    def test_lookup_misses_unknown_models(self):
+        self.assertIsNone(self._cache.lookup(self._model, "all"))
+
+
+    def test_lookup_returns_recorded_configurations(self):
+        configurations = [self._configuration("1GB"), self._configuration("2GB")]
+        list(self._cache.recording(self._model, "all", configurations))
+
+        cached = list(self._cache.lookup(self._model, "all"))
+
+        self.assertEqual([each.signature for each in configurations],
+                         [each.signature for each in cached])
+
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for each_values in [["1GB"], ["2GB"], ["4GB"]]:
+            model = self._create_model(each_values)
+            self._cache.store(model, "all", [])
+
+        self.assertEqual(2, len(listdir(self.DIRECTORY)))
+        self.assertIsNone(self._cache.lookup(self._create_model(["1GB"]), "all"))
+
+
+
+class CountingYAML(YAML):
+
+
+    def __init__(self):
+        super(CountingYAML, self).__init__()
+        self.parsed = 0
+
+
+    def load_model_from(self, stream):
+        self.parsed += 1
+        return super(CountingYAML, self).load_model_from(stream)
+
+
+
+class ModelsAreCached(TestCase):
+
+
+    def setUp(self):
+        if isdir(self.DIRECTORY):
+            rmtree(self.DIRECTORY)
+        makedirs(self.DIRECTORY)
+        self._path = join_paths(self.DIRECTORY, "camp.yml")
+        self._write(self.MODEL)
+        self._codec = CountingYAML()
+        self._cache = ModelCache(join_paths(self.DIRECTORY, "cache"))
+
+    DIRECTORY = "tmp/models"
+
+    MODEL = ("goals:\n"
+             "  running: [ Awesome ]\n"
+             "components:\n"
+             "  server:\n"
+             "    provides_services: [ Awesome ]\n")
+
+
+    def _write(self, text, modified=1000):
+        with open(self._path, "w") as stream:
+            stream.write(text)
+        utime(self._path, (modified, modified))
+
+
+    def test_models_are_parsed_once(self):
+        self._cache.load(self._path, self._codec)
+        model, locations, warnings = self._cache.load(self._path, self._codec)
+
+        self.assertEqual(1, self._codec.parsed)
+        self.assertEqual(["server"], [each.name for each in model.components])
+        self.assertEqual((4, 3), locations["components/server"])
+        self.assertEqual([], warnings)
+
+
+    def test_touched_models_are_not_parsed_again(self):
+        self._cache.load(self._path, self._codec)
+        self._write(self.MODEL, modified=2000)
+
+        self._cache.load(self._path, self._codec)
+
+        self.assertEqual(1, self._codec.parsed)
+
+
+    def test_modified_models_are_parsed_again(self):
+        self._cache.load(self._path, self._codec)
+        self._write(self.MODEL.replace("server", "proxy"), modified=2000)
+
+        model, _, _ = self._cache.load(self._path, self._codec)
+
+        self.assertEqual(2, self._codec.parsed)
+        self.assertEqual(["proxy"], [each.name for each in model.components])
+
+
+    def test_models_modified_within_the_same_second_are_parsed_again(self):
+        self._cache.load(self._path, self._codec)
+        self._write(self.MODEL.replace("server", "proxy"))
+
+        model, _, _ = self._cache.load(self._path, self._codec)
+
+        self.assertEqual(2, self._codec.parsed)
+        self.assertEqual(["proxy"], [each.name for each in model.components])
+
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ModelCache(self._cache.directory, capacity=2)
+        for index in range(3):
+            path = join_paths(self.DIRECTORY, "camp_%d.yml" % index)
+            with open(path, "w") as stream:
+                stream.write(self.MODEL)
+            cache.load(path, self._codec)
+
+        self.assertEqual(2, len(listdir(cache.directory)))
+
+
+    def test_corrupted_entries_are_ignored(self):
+        self._cache.load(self._path, self._codec)
+        for each in listdir(self._cache.directory):
+            with open(join_paths(self._cache.directory, each), "w") as stream:
+                stream.write("garbage")
+
+        model, _, _ = self._cache.load(self._path, self._codec)
+
+        self.assertEqual(2, self._codec.parsed)
+        self.assertEqual(["server"], [each.name for each in model.components])
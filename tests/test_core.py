@@ -0,0 +1,178 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.codecs.yaml import YAML
+from camp.commands import Command
+from camp.core import Camp
+from camp.directories import IndexedOutputDirectory
+from camp.entities.model import Instance, Configuration
+from camp.ui import UI
+
+from os import listdir, makedirs
+from os.path import isdir, join
+
+from shutil import rmtree
+
+from StringIO import StringIO
+
+from unittest import TestCase
+
+
+
+class FakeProblem(object):
+    """
+    Yield one configuration per value of the first variable of each
+    component, made of a single instance, and reuse every
+    configuration replayed.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self._known = set()
+
+
+    @staticmethod
+    def from_model(model, optimize=True):
+        return FakeProblem(model)
+
+
+    @staticmethod
+    def all_solutions_by_parts(model, jobs=None):
+        return FakeProblem(model).all_solutions()
+
+
+    def replay(self, configuration):
+        self._known.add(configuration.signature)
+        return True
+
+
+    def all_solutions(self):
+        for each_component in sorted(self._model.components, key=lambda c: c.name):
+            variables = each_component.variables
+            values = variables[0].domain if variables else [None]
+            for each_value in values:
+                configuration = [(variables[0], each_value)] if variables else []
+                instance = Instance(each_component.name + "_0",
+                                    each_component,
+                                    configuration)
+                result = Configuration(self._model, [instance])
+                if not result.signature in self._known:
+                    yield result
+
+
+
+class FakeBuilder(object):
+
+
+    def __init__(self):
+        self.built = []
+
+
+    def build(self, configuration, working_directory, path):
+        self.built.append(path)
+
+
+
+class StoresAreNotMixedUp(TestCase):
+
+    DIRECTORY = "tmp/core"
+
+    MODEL = ("components:\n"
+             "   server:\n"
+             "      provides_services: [ MyService ]\n"
+             "      variables:\n"
+             "         memory:\n"
+             "           values: [ %s ]\n"
+             "%s"
+             "goals:\n"
+             "   running:\n"
+             "      - MyService\n")
+
+
+    def setUp(self):
+        if isdir(self.DIRECTORY):
+            rmtree(self.DIRECTORY)
+        makedirs(self.DIRECTORY)
+        self._builder = FakeBuilder()
+        self._camp = Camp(YAML(), FakeProblem, self._builder, UI(StringIO()))
+
+
+    def test_realize_ignores_the_database_after_generating_folders(self):
+        self._write_model("1GB, 2GB, 4GB")
+        self._run("generate", "--all", "--store", "sqlite")
+        self._write_model("1GB")
+        self._run("generate", "--all")
+
+        self._run("realize")
+
+        self.assertFalse(IndexedOutputDirectory.exists_in(join(self.DIRECTORY, "out")))
+        self.assertEqual([join(self.DIRECTORY, "out", "config_1")],
+                         self._builder.built)
+
+
+    def test_realize_reads_the_database_after_generating_into_it(self):
+        self._write_model("1GB, 2GB")
+        self._run("generate", "--all", "--store", "sqlite")
+
+        self._run("realize")
+
+        self.assertEqual(2, len(self._builder.built))
+
+
+    def test_realize_skips_configurations_made_obsolete(self):
+        self._write_model("1GB", self.LEGACY)
+        self._run("generate", "--all")
+        self._write_model("1GB")
+        self._run("generate", "--all", "--incremental")
+
+        self._run("realize")
+
+        self.assertEqual([join(self.DIRECTORY, "out", "config_3")],
+                         self._builder.built)
+        self.assertTrue(isdir(join(self.DIRECTORY, "out", "obsolete", "config_1")))
+
+    def test_export_materializes_a_stream(self):
+        self._write_model("1GB, 2GB, 4GB")
+        stream = join(self.DIRECTORY, "out.ndjson")
+        self._run("generate", "--all", "--stream", stream)
+
+        self._run("export", "--from", stream, "--where", "memory=2GB")
+
+        self.assertEqual(["config_2"], listdir(join(self.DIRECTORY, "out")))
+        self._run("realize")
+        self.assertEqual([join(self.DIRECTORY, "out", "config_2")],
+                         self._builder.built)
+
+
+    def test_streaming_to_stdout_restores_the_ui(self):
+        ui = self._camp._ui
+        self._write_model("1GB")
+
+        self._run("generate", "--all", "--stream")
+
+        self.assertIs(ui, self._camp._ui)
+
+
+    LEGACY = ("   legacy:\n"
+              "      requires_features: [ Linux ]\n"
+              "   linux:\n"
+              "      provides_features: [ Linux ]\n")
+
+
+    def _write_model(self, values, extra_components=""):
+        with open(join(self.DIRECTORY, "camp.yml"), "w") as model:
+            model.write(self.MODEL % (values, extra_components))
+
+
+    def _run(self, *arguments):
+        command = Command.extract_from(list(arguments) + ["-d", self.DIRECTORY])
+        command.send_to(self._camp)
@@ -0,0 +1,117 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.directories import IndexedOutputDirectory, NoConfigurationFound
+from camp.entities.model import Model, Component, Service, Variable, \
+    Goals, Instance, Configuration
+
+from os.path import isdir, isfile, join
+
+from shutil import rmtree
+
+from unittest import TestCase
+
+
+
+class ConfigurationsAreIndexed(TestCase):
+
+    DIRECTORY = "tmp/store/out"
+
+
+    def setUp(self):
+        if isdir(self.DIRECTORY):
+            rmtree(self.DIRECTORY)
+        self._model = Model(
+            [
+                Component("server",
+                          provided_services=[Service("Awesome")],
+                          variables=[Variable("memory", "Symbols", ["1GB", "2GB"])]),
+                Component("proxy",
+                          provided_services=[Service("Proxy")],
+                          required_services=[Service("Awesome")])
+            ],
+            Goals(services=[Service("Awesome")]))
+        self._store = IndexedOutputDirectory(self.DIRECTORY)
+
+
+    def tearDown(self):
+        self._store.close()
+
+
+    def _configuration(self, memory, with_proxy=False):
+        server = self._model.resolve("server")
+        server_0 = Instance("server_0", server, [(server.variables[0], memory)])
+        instances = [server_0]
+        if with_proxy:
+            proxy_0 = Instance("proxy_0", self._model.resolve("proxy"))
+            proxy_0.service_providers = [server_0]
+            instances.append(proxy_0)
+        return Configuration(self._model, instances)
+
+
+    def _save_samples(self):
+        self._store.save_as_yaml(1, self._configuration("1GB"))
+        self._store.save_as_yaml(2, self._configuration("2GB", with_proxy=True))
+        self._store.save_as_yaml(3, self._configuration("1GB", with_proxy=True))
+
+
+    def test_configurations_are_accessed_by_index(self):
+        self._save_samples()
+
+        configuration = self._store.configuration_at(self._model, 2)
+
+        self.assertEqual(self._configuration("2GB", with_proxy=True).signature,
+                         configuration.signature)
+
+
+    def test_configurations_are_filtered_by_component(self):
+        self._save_samples()
+
+        self.assertEqual([2, 3], self._store.indices(component="proxy"))
+
+
+    def test_configurations_are_filtered_by_value(self):
+        self._save_samples()
+
+        self.assertEqual([1, 3], self._store.indices("server", "memory", "1GB"))
+
+
+    def test_all_configurations_are_listed_in_order(self):
+        self._save_samples()
+
+        indices = [path for path, _ in self._store.existing_configurations(self._model)]
+
+        self.assertEqual([join(self.DIRECTORY, "config_%d" % i) for i in [1, 2, 3]],
+                         indices)
+
+
+    def test_saving_again_replaces_the_configuration(self):
+        self._save_samples()
+
+        self._store.save_as_yaml(3, self._configuration("2GB"))
+
+        self.assertEqual([2], self._store.indices(component="proxy"))
+        self.assertEqual([2, 3], self._store.indices("server", "memory", "2GB"))
+
+
+    def test_configurations_are_exported_as_folders(self):
+        self._save_samples()
+
+        paths = self._store.export(self._model, [2])
+
+        self.assertEqual([join(self.DIRECTORY, "config_2", "configuration.yml")], paths)
+        self.assertTrue(isfile(paths[0]))
+
+
+    def test_missing_database(self):
+        with self.assertRaises(NoConfigurationFound):
+            list(self._store.existing_configurations(self._model))
@@ -0,0 +1,183 @@
+#
+# CAMP
+#
+# Copyright (C) 2017, 2018 SINTEF Digital
+# All rights reserved.
+#
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+#
+
+
+
+from camp.codecs.yaml import YAML
+from camp.commands import Generate
+from camp.entities.model import Instance, Configuration
+from camp.serve import GenerationServer, GenerationClient, GenerationFailed, \
+    RemoteHostRefused
+
+from StringIO import StringIO
+
+from unittest import TestCase
+
+from urllib2 import HTTPError, Request, urlopen
+
+
+
+class FakeCamp(object):
+    """
+    Yield one configuration per value of the first variable of the
+    'server' component, and then raise the given failure, if any.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.failure = None
+
+
+    def configurations_for(self, arguments, model):
+        self.requests.append(arguments)
+        return 1, self._configurations(model)
+
+
+    def _configurations(self, model):
+        server = model.resolve("server")
+        memory = server.variables[0]
+        for each_value in memory.domain:
+            instance = Instance("server_0", server, [(memory, each_value)])
+            yield Configuration(model, [instance])
+        if self.failure:
+            raise self.failure
+
+
+
+class ConfigurationsAreServed(TestCase):
+
+    MODEL = ("components:\n"
+             "   server:\n"
+             "      provides_services: [ MyService ]\n"
+             "      variables:\n"
+             "         memory:\n"
+             "           values: [ 1GB, 2GB, 4GB ]\n"
+             "goals:\n"
+             "   running:\n"
+             "      - MyService\n")
+
+
+    def setUp(self):
+        self._camp = FakeCamp()
+        self._server = GenerationServer(self._camp, port=0, token=self.TOKEN)
+        self._server.start()
+        self._client = GenerationClient(self._server.address, self.TOKEN)
+        self._model = YAML().load_model_from(StringIO(self.MODEL))
+
+
+    TOKEN = "secret"
+
+
+    def tearDown(self):
+        self._server.shutdown()
+
+
+    def _configurations(self, arguments, text=None):
+        return list(self._client.configurations(self._model,
+                                                text or self.MODEL,
+                                                arguments))
+
+
+    def test_configurations_are_streamed_back(self):
+        configurations = self._configurations(Generate(coverage=False))
+
+        self.assertEqual(["1GB", "2GB", "4GB"],
+                         [each.resolve("server_0")["memory"] for each in configurations])
+
+
+    def test_options_are_forwarded(self):
+        self._configurations(Generate(coverage="greedy", limit=2))
+
+        arguments = self._camp.requests[0]
+        self.assertEqual(Generate.GREEDY, arguments.coverage_engine)
+        self.assertEqual(2, arguments.limit)
+
+
+    def test_the_limit_stops_the_generation(self):
+        configurations = self._configurations(Generate(coverage=False, limit=2))
+
+        self.assertEqual(2, len(configurations))
+
+
+    def test_invalid_models_are_rejected(self):
+        with self.assertRaises(HTTPError):
+            self._configurations(Generate(),
+                                 text=self.MODEL.replace("MyService", "Unknown", 1))
+
+
+    def test_unsupported_options_are_rejected(self):
+        self.assertEqual(400, self._post("/generate?all=&stream=%2Ftmp%2Fout"))
+        self.assertEqual([], self._camp.requests)
+
+
+    def test_unsafe_constraints_are_rejected(self):
+        model = self.MODEL + "constraints:\n" \
+                "   - __import__('os').system('touch /tmp/camp')\n"
+
+        self.assertEqual(400, self._post("/generate?all=", model=model))
+        self.assertEqual([], self._camp.requests)
+
+
+    def test_requests_without_the_token_are_rejected(self):
+        self.assertEqual(403, self._post("/generate?all=", token=None))
+        self.assertEqual(403, self._post("/cancel", token="guess"))
+        self.assertEqual([], self._camp.requests)
+
+
+    def test_requests_from_browsers_are_rejected(self):
+        self.assertEqual(403, self._post("/generate?all=",
+                                         headers={"Origin": "http://evil.com"}))
+        self.assertEqual([], self._camp.requests)
+
+
+    def test_models_that_are_not_yaml_are_rejected(self):
+        self.assertEqual(415, self._post("/generate?all=",
+                                         headers={"Content-Type": "text/plain"}))
+        self.assertEqual([], self._camp.requests)
+
+
+    def test_other_interfaces_are_refused(self):
+        with self.assertRaises(RemoteHostRefused):
+            GenerationServer(self._camp, host="0.0.0.0", port=0)
+
+
+    def test_other_interfaces_are_served_when_forced(self):
+        server = GenerationServer(self._camp, host="0.0.0.0", port=0, remote=True)
+        server.start()
+        server.shutdown()
+
+
+    def test_errors_are_reported_after_the_configurations(self):
+        self._camp.failure = RuntimeError("Solver crashed")
+        configurations = []
+
+        with self.assertRaises(GenerationFailed) as context:
+            for each in self._client.configurations(self._model, self.MODEL,
+                                                    Generate(coverage=False)):
+                configurations.append(each)
+
+        self.assertEqual(3, len(configurations))
+        self.assertEqual("Solver crashed", str(context.exception))
+
+
+    def _post(self, path, model=None, token=TOKEN, headers=None):
+        all_headers = {"Content-Type": GenerationServer.CONTENT_TYPES[0]}
+        if token is not None:
+            all_headers[GenerationServer.TOKEN_HEADER] = token
+        all_headers.update(headers or {})
+        request = Request(self._server.address + path,
+                          data=model or self.MODEL,
+                          headers=all_headers)
+        try:
+            urlopen(request).close()
+            return 200
+
+        except HTTPError as error:
+            return error.code